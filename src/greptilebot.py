@@ -2,17 +2,26 @@
 import os
 import sys
 import json
+import random
+import functools
+import operator
 import time
 import urllib.parse
 import traceback
 from datetime import datetime, timedelta
-from enum import Enum
+from enum import Enum, IntEnum
 from typing import Optional, List, Dict, Any, Tuple, Union
-from collections import defaultdict
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 
 # Third-party library imports
 import yaml
+try:
+    # The C loader is ~10x faster than the pure-Python fallback when libyaml
+    # is available; parsing secrets is cold-path but startup still benefits.
+    from yaml import CSafeLoader as YamlSafeLoader
+except ImportError:
+    from yaml import SafeLoader as YamlSafeLoader
 import aiohttp
 import discord
 import sqlite3
@@ -22,56 +31,254 @@ from discord.ext import commands, tasks
 from discord.ui import View, Button
 from aiohttp import ClientResponseError, ServerDisconnectedError
 from tenacity import retry, stop_after_attempt, wait_exponential
-
-# Logging setup
+try:
+    # orjson encodes/decodes the repository payloads and multi-source query
+    # responses several times faster than stdlib json; fall back when absent.
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    # libuv-backed event loop; noticeably less overhead per await on an
+    # I/O-heavy workload like this. Optional.
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# Logging setup. Handlers write to disk synchronously, which would stall the
+# event loop on every log line at DEBUG verbosity; route records through a
+# queue so the file write happens on the listener's background thread.
+import atexit
 import logging
+import logging.handlers
+import queue
+
+_log_queue = queue.SimpleQueue()
+_file_handler = logging.FileHandler('bot.log')
+_file_handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(message)s'))
 logging.basicConfig(
-    filename='bot.log',
-    level=logging.DEBUG,
-    format='%(asctime)s:%(levelname)s:%(message)s'
+    # INFO by default: at DEBUG every API call serializes its payload and
+    # response body into the log stream, which is pure overhead in normal
+    # operation. Drop to DEBUG locally when tracing a problem.
+    level=logging.INFO,
+    handlers=[logging.handlers.QueueHandler(_log_queue)]
 )
+_log_listener = logging.handlers.QueueListener(_log_queue, _file_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)  # drain pending records on shutdown
 logger = logging.getLogger(__name__)
 
 active_queries = set()
-last_query_time = defaultdict(float)
 COOLDOWN_TIME = 5  # 5 seconds cooldown
 
-class DatabasePool:
-    def __init__(self, database_name, max_connections=5):
+# Last query timestamp per user, kept in LRU order and size-bounded: the old
+# defaultdict held an entry for every user ever seen for the life of the
+# process. Anyone evicted here has long outlived the cooldown anyway.
+last_query_time: 'OrderedDict[int, float]' = OrderedDict()
+MAX_COOLDOWN_ENTRIES = 10000
+
+def cooldown_remaining(user_id: int, now: float) -> float:
+    """Seconds of cooldown left for this user; zero or negative means clear.
+
+    Timestamps are time.monotonic() values: cooldowns measure elapsed time,
+    so they should not jump with wall-clock adjustments, and the monotonic
+    read is also the cheaper call.
+    """
+    return COOLDOWN_TIME - (now - last_query_time.get(user_id, 0.0))
+
+def touch_cooldown(user_id: int, now: float):
+    last_query_time[user_id] = now
+    last_query_time.move_to_end(user_id)
+    if len(last_query_time) > MAX_COOLDOWN_ENTRIES:
+        last_query_time.popitem(last=False)
+
+class Database:
+    """One writer connection plus a dedicated reader.
+
+    SQLite gains nothing from a homogeneous pool of connections to the same
+    local file: every aiosqlite connection spawns its own worker thread, so
+    a pool just adds idle threads and a queue hop on each acquire. What WAL
+    mode does reward is keeping reads on their own connection -- a reader
+    sees a consistent snapshot and proceeds while the writer holds a
+    transaction, instead of queueing behind it.
+    """
+    def __init__(self, database_name):
         self.database_name = database_name
-        self.max_connections = max_connections
-        self._pool = asyncio.Queue(maxsize=max_connections)
+        self._conn = None
+        self._read_conn = None
+
+    async def _connect(self):
+        # A roomy statement cache means the recurring whitelist/config/repo
+        # statements skip sqlite3_prepare on every execution.
+        conn = await aiosqlite.connect(self.database_name, cached_statements=256)
+        # journal_mode is persistent once set, the rest are per-connection.
+        await conn.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA cache_size=-64000;"
+            "PRAGMA mmap_size=268435456;"
+            "PRAGMA busy_timeout=5000;"
+            "PRAGMA journal_size_limit=6144000;"
+            "PRAGMA foreign_keys=ON;"
+        )
+        return conn
 
     async def init(self):
-        for _ in range(self.max_connections):
-            conn = await aiosqlite.connect(self.database_name)
-            await self._pool.put(conn)
+        self._conn = await self._connect()
+        self._read_conn = await self._connect()
 
     @asynccontextmanager
     async def acquire(self):
-        conn = await self._pool.get()
-        try:
-            yield conn
-        finally:
-            await self._pool.put(conn)
+        yield self._conn
 
-    async def close(self):
-        while not self._pool.empty():
-            conn = await self._pool.get()
-            await conn.close()
+    @asynccontextmanager
+    async def acquire_read(self):
+        yield self._read_conn
 
-db_pool = DatabasePool('bot_data.db')
+    async def close(self):
+        if self._read_conn is not None:
+            await self._read_conn.close()
+            self._read_conn = None
+        if self._conn is not None:
+            # Let SQLite refresh its query-planner statistics before the
+            # connection goes away, as the pragma docs recommend for
+            # long-lived connections.
+            try:
+                await self._conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            await self._conn.close()
+            self._conn = None
+
+db = Database('bot_data.db')
+
+# Shared HTTP session for all Greptile API calls. Created lazily so it binds
+# to the bot's event loop; keeping it alive reuses TCP/TLS connections instead
+# of paying the handshake cost on every command. The static auth headers live
+# here too, so per-call payloads carry only the fields that actually vary.
+http_session: Optional[aiohttp.ClientSession] = None
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use."""
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            # The API lives on one host, so a long DNS TTL and generous
+            # keep-alive mean most requests reuse both the resolved address
+            # and an open TLS connection; cleanup of aborted TLS transports
+            # is enabled so long-lived connectors don't leak them.
+            connector=aiohttp.TCPConnector(
+                limit=32,
+                use_dns_cache=True,
+                ttl_dns_cache=600,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True
+            ),
+            # Default ceiling for calls that don't pass an explicit timeout
+            # (status GETs in particular); derived from the configured API
+            # timeout rather than a separate hard-coded constant. The session
+            # is recreated on ~reload, which picks up config changes.
+            timeout=aiohttp.ClientTimeout(total=typed_config.api_timeout),
+            json_serialize=json_dumps,
+            headers={
+                'Authorization': f'Bearer {GREPTILE_API_KEY}',
+                'X-GitHub-Token': GITHUB_TOKEN
+            }
+        )
+    return http_session
+
+async def close_http_session():
+    """Close the shared aiohttp session if it exists."""
+    global http_session
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+    http_session = None
+
+# Resolved to direct references at import time: keeping the "is orjson
+# available" branch out of the helpers removes a test per call, and in the
+# loads case the whole Python frame -- decodes go straight into the C
+# function on every response.
+if orjson is not None:
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+    json_dumps_bytes = orjson.dumps
+    json_loads = orjson.loads
+else:
+    json_dumps = json.dumps
+    def json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+    json_loads = json.loads
+
+# Request bodies are posted as pre-encoded bytes (data=...) so aiohttp never
+# has to serialize and then utf-8 encode a str payload itself; only the
+# content type needs to be supplied alongside.
+JSON_HEADERS = {'Content-Type': 'application/json'}
 
 MAX_EMBED_DESCRIPTION_LENGTH = 4096
 MAX_EMBED_FIELD_VALUE_LENGTH = 1024
 
+# Reused across every error branch instead of re-resolving the colour and
+# rebuilding identical embed kwargs at each call site.
+ERROR_RED = discord.Color.red()
+SUCCESS_GREEN = discord.Color.green()
+
+def error_embed(description: str, title: str = "Error") -> discord.Embed:
+    return discord.Embed(title=title, description=description, color=ERROR_RED)
+
+def parse_snowflake(value: str) -> Optional[int]:
+    """Parse a Discord ID, returning None when the string isn't a valid one."""
+    try:
+        parsed = int(value)
+    except ValueError:
+        return None
+    return parsed if 0 <= parsed < (1 << 63) else None
+
+# Embeds whose content never varies, built once at import time so repeated
+# validation failures don't re-allocate identical objects.
+ERR_INVALID_USER_ID = error_embed("Invalid user ID. Please provide a valid Discord user ID.")
+ERR_INVALID_CHANNEL_ID = error_embed("Invalid channel ID. Please provide a valid Discord channel ID.")
+
+def command_errorhandler(action: Optional[str] = None):
+    """Shared tail for admin commands: log, report and answer failures.
+
+    Replaces the identical sqlite3.Error/Exception blocks that used to be
+    pasted into every command body. `action` is the phrasing shown to the
+    user ("updating the whitelist"); the reply embeds are built once per
+    decorated command, not per failure.
+    """
+    def decorator(func):
+        suffix = f" while {action}" if action else ""
+        db_embed = error_embed(f"A database error occurred{suffix}. Please try again later.")
+        unexpected_embed = error_embed(f"An unexpected error occurred{suffix}. Please try again later.")
+
+        @functools.wraps(func)
+        async def wrapper(ctx: commands.Context, *args, **kwargs):
+            try:
+                await func(ctx, *args, **kwargs)
+            except sqlite3.Error as e:
+                error_message = f"Database error in {func.__name__}: {str(e)}"
+                logger.error(error_message)
+                await report_error(error_message)
+                await ctx.send(embed=db_embed)
+            except Exception as e:
+                error_message = f"Unexpected error in {func.__name__}: {str(e)}"
+                logger.error(error_message)
+                await report_error(error_message)
+                await ctx.send(embed=unexpected_embed)
+        return wrapper
+    return decorator
+
 def load_secrets():
+    # Runs synchronously at import, before the event loop exists, so there
+    # is nothing to offload. Should this ever move inside the running loop,
+    # prefer loop.run_in_executor over asyncio.to_thread: the parse doesn't
+    # need the caller's contextvars, and to_thread copies them on each call.
     script_dir = os.path.dirname(os.path.abspath(__file__))
     secrets_path = os.path.join(script_dir, 'secrets.yaml')
     
     try:
         with open(secrets_path, 'r') as secrets_file:
-            secrets = yaml.safe_load(secrets_file)
+            secrets = yaml.load(secrets_file, Loader=YamlSafeLoader)
         
         required_keys = ['DISCORD_BOT_TOKEN', 'GREPTILE_API_KEY', 'GITHUB_TOKEN', 'BOT_OWNER_ID']
         for key in required_keys:
@@ -100,7 +307,9 @@ try:
     TOKEN = secrets['DISCORD_BOT_TOKEN']
     GREPTILE_API_KEY = secrets['GREPTILE_API_KEY']
     GITHUB_TOKEN = secrets['GITHUB_TOKEN']
-    BOT_OWNER_ID = secrets['BOT_OWNER_ID']
+    # Parsed once so the per-command owner checks compare ints instead of
+    # allocating a str(author.id) on every call
+    BOT_OWNER_ID = int(secrets['BOT_OWNER_ID'])
 except Exception as e:
     print(f"Error setting up configuration: {e}")
     sys.exit(1)
@@ -116,28 +325,43 @@ class RepoRemote(Enum):
     GITHUB = "github"
     GITLAB = "gitlab"
 
-class UserRole(Enum):
-    USER = "user"
-    ADMIN = "admin"
-    OWNER = "owner"
+class UserRole(IntEnum):
+    # Integer ranks so permission checks are a plain int comparison. The
+    # lowercase member name is what gets stored in the whitelist table.
+    USER = 1
+    ADMIN = 2
+    OWNER = 3
+
+    @property
+    def db_value(self) -> str:
+        return self.name.lower()
+
+    @classmethod
+    def from_db(cls, value: str) -> 'UserRole':
+        return cls[value.upper()]
+
+# Serializes write transactions now that every caller shares one connection.
+db_write_lock = asyncio.Lock()
 
 @asynccontextmanager
 async def db_transaction():
-    async with db_pool.acquire() as conn:
-        async with conn.cursor() as cur:
-            try:
-                await conn.execute("BEGIN")
-                yield cur
-                await conn.commit()
-            except Exception:
-                await conn.rollback()
-                raise
+    async with db_write_lock:
+        async with db.acquire() as conn:
+            async with conn.cursor() as cur:
+                try:
+                    # IMMEDIATE takes the write lock up front instead of on
+                    # the first write, avoiding a mid-transaction upgrade.
+                    await conn.execute("BEGIN IMMEDIATE")
+                    yield cur
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
 
 async def load_db_config():
     try:
-        async with db_pool.acquire() as conn:
-            async with conn.execute("SELECT key, value FROM config") as cursor:
-                return {row[0]: row[1] for row in await cursor.fetchall()}
+        async with db.acquire_read() as conn:
+            return dict(await conn.execute_fetchall("SELECT key, value FROM config"))
     except sqlite3.Error as e:
         error_message = f"Database error in load_db_config: {str(e)}"
         logger.error(error_message)
@@ -151,23 +375,154 @@ async def load_db_config():
 
 CONFIG = {}
 
-# Track user queries
-user_queries = defaultdict(lambda: defaultdict(list))
+# Rendered body of ~viewconfig; invalidated whenever the config changes.
+config_view_cache: Optional[str] = None
+
+# Global cap on in-flight Greptile API requests. Every query, search and
+# status fetch acquires this before touching the network, so a burst of
+# commands degrades to queueing instead of hammering the API into rate
+# limits. Resized from the GREPTILE_CONCURRENCY config key on refresh.
+greptile_semaphore = asyncio.Semaphore(8)
+
+class TypedConfig:
+    """Typed view of the config table.
+
+    Hot paths read plain attributes off this object instead of doing a dict
+    lookup plus int()/float() parse on CONFIG for every command.
+    """
+    def __init__(self):
+        self.max_queries = 5
+        self.max_smart_queries = 1
+        self.max_search_queries = 5
+        self.api_timeout = 60.0
+        self.api_retries = 3
+        self.query_limits = {
+            'queries': self.max_queries,
+            'smart_queries': self.max_smart_queries,
+            'search': self.max_search_queries,
+        }
+        self.default_branch = 'main'
+        self.greptile_concurrency = 8
+        self.log_channel: Optional[int] = None
+        self.error_channel: Optional[int] = None
+
+    def refresh(self, config: Dict[str, str]):
+        self.max_queries = int(config.get('MAX_QUERIES_PER_DAY', 5))
+        self.max_smart_queries = int(config.get('MAX_SMART_QUERIES_PER_DAY', 1))
+        self.max_search_queries = int(config.get('MAX_SEARCH_QUERIES_PER_DAY', 5))
+        self.api_timeout = float(config.get('API_TIMEOUT', 60))
+        self.api_retries = int(config.get('API_RETRIES', 3))
+        # Rebuilt on refresh so the admission check resolves its limit with
+        # one dict lookup instead of branching on the query type.
+        self.query_limits = {
+            'queries': self.max_queries,
+            'smart_queries': self.max_smart_queries,
+            'search': self.max_search_queries,
+        }
+        self.default_branch = config.get('DEFAULT_BRANCH', 'main')
+        concurrency = int(config.get('GREPTILE_CONCURRENCY', 8))
+        if concurrency != self.greptile_concurrency:
+            self.greptile_concurrency = concurrency
+            global greptile_semaphore
+            greptile_semaphore = asyncio.Semaphore(concurrency)
+        log_channel = config.get('log_channel')
+        self.log_channel = int(log_channel) if log_channel else None
+        error_channel = config.get('error_channel')
+        self.error_channel = int(error_channel) if error_channel else None
+
+typed_config = TypedConfig()
+
+# Daily query counts: (user_id, query_type) -> (day ordinal, count). Keeping
+# the day in the value means one entry per user per query type, instead of
+# leaving a dead key behind for every past day.
+user_quota: Dict[Tuple[int, str], Tuple[int, int]] = {}
+
+# Today's ordinal, recomputed at most once a minute. The admission path runs
+# on every command, and constructing a datetime just to take its ordinal is
+# two allocations plus a clock read for a value that changes once a day; a
+# minute of staleness at the midnight rollover is harmless for daily quotas.
+_day_cache: Tuple[float, int] = (0.0, 0)
+
+def current_day() -> int:
+    global _day_cache
+    checked, day = _day_cache
+    now = time.monotonic()
+    if now - checked > 60.0 or day == 0:
+        day = datetime.now().toordinal()
+        _day_cache = (now, day)
+    return day
+
+def get_query_count(user_id: int, query_type: str) -> int:
+    entry = user_quota.get((user_id, query_type))
+    if entry is None or entry[0] != current_day():
+        return 0
+    return entry[1]
+
+MAX_QUOTA_ENTRIES = 20000
+
+def record_query(user_id: int, query_type: str):
+    today = current_day()
+    if len(user_quota) > MAX_QUOTA_ENTRIES:
+        # Entries stamped with a previous day are dead weight; shed them all
+        # at once the rare time the map outgrows its bound.
+        for stale in [key for key, value in user_quota.items() if value[0] != today]:
+            del user_quota[stale]
+    user_quota[(user_id, query_type)] = (today, get_query_count(user_id, query_type) + 1)
 
 # Helper functions
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
-async def make_api_call(session, url, payload, headers):
-    logger.info(f"Sending request to {url}")
-    logger.info(f"Request payload: {json.dumps(payload, indent=2)}")
-    logger.info(f"Request headers: {json.dumps(headers, indent=2)}")
-
-    async with session.post(url, json=payload, headers=headers) as response:
-        logger.info(f"Response status: {response.status}")
-        logger.info(f"Response headers: {json.dumps(dict(response.headers), indent=2)}")
-        response_text = await response.text()
-        logger.info(f"Response body: {response_text}")
+async def make_api_call(url, payload):
+    session = await get_http_session()
+    logger.info("Sending request to %s", url)
+    if logger.isEnabledFor(logging.DEBUG):
+        # Guarded: serializing the payload just to discard the record would
+        # cost more than the call it documents.
+        logger.debug("Request payload: %s", json_dumps(payload))
+
+    async with greptile_semaphore, session.post(url, data=json_dumps_bytes(payload), headers=JSON_HEADERS) as response:
+        logger.info("Response status: %s", response.status)
+        # Feed the raw bytes straight to the JSON decoder; decoding the body
+        # to str first only existed to log it.
+        body = await response.read()
+        logger.debug("Response body: %s", body)
         response.raise_for_status()
-        return json.loads(response_text)
+        return json_loads(body)
+
+async def greptile_post(url, payload, timeout: Optional[aiohttp.ClientTimeout] = None):
+    """
+    POST to the Greptile API with bounded, jittered exponential backoff.
+
+    Retries transient failures (HTTP 5xx and connection-level client errors);
+    returns the decoded JSON response, or raises the final error once the
+    retry budget is exhausted.
+    """
+    session = await get_http_session()
+    retries = typed_config.api_retries
+    for attempt in range(retries):
+        retry_after = None
+        try:
+            async with greptile_semaphore, session.post(url, data=json_dumps_bytes(payload), headers=JSON_HEADERS, timeout=timeout) as response:
+                response.raise_for_status()
+                # Decode the raw bytes directly; .json() would re-check the
+                # content type and sniff the charset first.
+                return json_loads(await response.read())
+        except aiohttp.ClientResponseError as e:
+            # 429 and 5xx are transient; anything else is the caller's
+            # problem immediately.
+            if (e.status < 500 and e.status != 429) or attempt == retries - 1:
+                raise
+            retry_after = e.headers.get('Retry-After') if e.headers else None
+        except aiohttp.ClientError:
+            if attempt == retries - 1:
+                raise
+        delay = random.uniform(0.5, 2.0) * 2 ** attempt
+        if retry_after is not None:
+            # The server's own pacing wins when it asks for a longer wait.
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        await asyncio.sleep(delay)
 
 async def handle_api_error(ctx, message, e):
     if isinstance(e, aiohttp.ClientResponseError):
@@ -185,26 +540,68 @@ async def handle_api_error(ctx, message, e):
 
     logger.error(error_message)
     await report_error(error_message)
-    await message.edit(embed=discord.Embed(title="Error", description=user_message, color=discord.Color.red()))
+    await message.edit(embed=error_embed(user_message))
     
+# In-memory mirror of the whitelist table so permission checks on every
+# command are a dict lookup instead of a DB round-trip. Loaded at startup
+# and kept in sync by the whitelist/admin commands.
+whitelist_cache: Dict[int, UserRole] = {}
+
+async def load_whitelist_cache():
+    async with db.acquire_read() as conn:
+        rows = await conn.execute_fetchall("SELECT user_id, role FROM whitelist")
+    # Mutated in place rather than rebound so the lookup methods the command
+    # predicates hold keep pointing at the live mapping.
+    whitelist_cache.clear()
+    whitelist_cache.update((user_id, UserRole.from_db(user_role)) for user_id, user_role in rows)
+
 def is_whitelisted(role: UserRole = UserRole.USER):
+    cache_get = whitelist_cache.get  # bound once per decoration, not per call
     async def predicate(ctx: commands.Context):
-        if str(ctx.author.id) == BOT_OWNER_ID:
+        if ctx.author.id == BOT_OWNER_ID:
             return True
-        async with db_pool.acquire() as conn:
-            async with conn.execute("SELECT role FROM whitelist WHERE user_id = ?", (str(ctx.author.id),)) as cursor:
-                result = await cursor.fetchone()
-        if not result:
+        user_role = cache_get(ctx.author.id)
+        if user_role is None:
             return False
-        user_role = UserRole(result[0])
-        return user_role.value >= role.value
+        return user_role >= role
+    return commands.check(predicate)
+
+class QueryLimitReached(commands.CheckFailure):
+    """Raised by gated() when a user is out of daily quota for a query type."""
+    def __init__(self, query_type: str):
+        self.query_type = query_type
+        super().__init__(f"Daily limit reached for {query_type}")
+
+def gated(query_type: str, role: UserRole = UserRole.USER):
+    """Fused admission check for quota-consuming commands.
+
+    Performs the owner bypass, whitelist lookup, and daily-quota check in a
+    single predicate instead of stacking a whitelist check with a second
+    quota test inside the command body. Quota exhaustion raises
+    QueryLimitReached so on_command_error can phrase the refusal per type.
+    """
+    cache_get = whitelist_cache.get
+    async def predicate(ctx: commands.Context):
+        uid = ctx.author.id
+        if uid == BOT_OWNER_ID:
+            return True
+        user_role = cache_get(uid)
+        if user_role is None or user_role < role:
+            return False
+        max_queries = typed_config.query_limits.get(query_type, typed_config.max_queries)
+        if get_query_count(uid, query_type) >= max_queries:
+            raise QueryLimitReached(query_type)
+        return True
     return commands.check(predicate)
 
 async def update_config(key: str, value: str):
+    global config_view_cache
+    config_view_cache = None
     try:
         async with db_transaction() as cur:
             await cur.execute("INSERT OR REPLACE INTO config (key, value) VALUES (?, ?)", (key, value))
         CONFIG[key] = value
+        typed_config.refresh(CONFIG)
     except sqlite3.Error as e:
         error_message = f"Database error in update_config: {str(e)}"
         logger.error(error_message)
@@ -216,11 +613,24 @@ async def update_config(key: str, value: str):
         await report_error(error_message)
         raise
 
+# Cached rows from the repos table and the API payload fragment derived from
+# them; both are cleared whenever the table is mutated.
+repo_cache: Optional[List[Tuple[str, str, str, str]]] = None
+repos_payload_cache: Optional[List[Dict[str, str]]] = None
+
+def invalidate_repo_cache():
+    global repo_cache, repos_payload_cache
+    repo_cache = None
+    repos_payload_cache = None
+
 async def get_repos() -> List[Tuple[str, str, str, str]]:
+    global repo_cache
+    if repo_cache is not None:
+        return repo_cache
     try:
-        async with db_pool.acquire() as conn:
-            async with conn.execute("SELECT remote, owner, name, branch FROM repos") as cursor:
-                return await cursor.fetchall()
+        async with db.acquire_read() as conn:
+            repo_cache = await conn.execute_fetchall("SELECT remote, owner, name, branch FROM repos")
+            return repo_cache
     except sqlite3.Error as e:
         error_message = f"Database error in get_repos: {str(e)}"
         logger.error(error_message)
@@ -232,66 +642,102 @@ async def get_repos() -> List[Tuple[str, str, str, str]]:
         await report_error(error_message)
         return []
 
-async def can_make_query(user_id: int, query_type: str) -> bool:
-    if str(user_id) == BOT_OWNER_ID:
-        return True
-    today = datetime.now().date()
-    user_queries[user_id][query_type] = [date for date in user_queries[user_id][query_type] if date.date() == today]
-    max_queries = int(CONFIG.get(f'MAX_{query_type.upper()}_QUERIES_PER_DAY', 5))
-    return len(user_queries[user_id][query_type]) < max_queries
+async def get_repos_payload() -> List[Dict[str, str]]:
+    """Return the cached "repositories" fragment used in query/search payloads."""
+    global repos_payload_cache
+    if repos_payload_cache is None:
+        repos_payload_cache = [
+            {
+                "remote": repo[0],
+                "repository": f"{repo[1]}/{repo[2]}",
+                "branch": repo[3]
+            } for repo in await get_repos()
+        ]
+    return repos_payload_cache
+
+# Endpoint URLs never vary at runtime; build them once instead of
+# re-interpolating the same strings inside every command invocation.
+GREPTILE_API_BASE = 'https://api.greptile.com/v2'
+REPOSITORIES_URL = f'{GREPTILE_API_BASE}/repositories'
+QUERY_URL = f'{GREPTILE_API_BASE}/query'
+SEARCH_URL = f'{GREPTILE_API_BASE}/search'
+
+@functools.lru_cache(maxsize=64)
+def status_url(remote: str, owner: str, name: str, branch: str) -> str:
+    """Build (and cache) the Greptile status URL for a repository tuple."""
+    repo_id = f"{remote}:{branch}:{owner}/{name}"
+    return f"{REPOSITORIES_URL}/{urllib.parse.quote(repo_id, safe='')}"
 
 async def get_repository_status(repo: Tuple[str, str, str, str], max_retries: int = 3) -> Optional[str]:
-    remote, owner, name, branch = repo
-    repo_id = f"{remote}:{branch}:{owner}/{name}"
-    encoded_repo_id = urllib.parse.quote(repo_id, safe='')
-    url = f'https://api.greptile.com/v2/repositories/{encoded_repo_id}'
-    
-    headers = {
-        'Authorization': f'Bearer {GREPTILE_API_KEY}',
-        'X-GitHub-Token': GITHUB_TOKEN
-    }
+    url = status_url(*repo)
 
     for attempt in range(max_retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    response.raise_for_status()
-                    repo_info = await response.json()
-                    logger.info(f"Repository info retrieved successfully: {repo_info}")
-                    return repo_info.get('status', 'Unknown')
+            session = await get_http_session()
+            async with greptile_semaphore, session.get(url) as response:
+                response.raise_for_status()
+                repo_info = json_loads(await response.read())
+                logger.info("Repository info retrieved successfully: %s", repo_info)
+                return repo_info.get('status', 'Unknown')
         except ServerDisconnectedError:
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt  # exponential backoff
-                logger.warning(f"Server disconnected. Retrying in {wait_time} seconds...")
+                logger.warning("Server disconnected. Retrying in %s seconds...", wait_time)
                 await asyncio.sleep(wait_time)
             else:
                 logger.error("Server disconnected after max retries")
                 await report_error("Server disconnected in get_repository_status after max retries")
                 return "Error: Server disconnected"
         except aiohttp.ClientResponseError as e:
-            logger.error(f"HTTP error occurred while checking repository status: {e.status} - {e.message}")
+            logger.error("HTTP error occurred while checking repository status: %s - %s", e.status, e.message)
             await report_error(f"HTTP error in get_repository_status: {e.status} - {e.message}")
             return f"Error: {e.status}"
         except aiohttp.ClientError as e:
-            logger.error(f"An error occurred while checking repository status: {str(e)}")
-            logger.error(f"URL attempted: {url}")
+            logger.error("An error occurred while checking repository status: %s", e)
+            logger.error("URL attempted: %s", url)
             await report_error(f"Client error in get_repository_status: {str(e)}")
             return "Error: Unable to connect"
         except Exception as e:
-            logger.error(f"Unexpected error in get_repository_status: {str(e)}")
+            logger.error("Unexpected error in get_repository_status: %s", e)
             await report_error(f"Unexpected error in get_repository_status: {str(e)}")
             return "Error: Unexpected issue"
 
-async def index_repository(ctx: commands.Context, repo: Tuple[str, str, str, str]) -> str:
+# Background indexing watchers, keyed by repo tuple. The semaphore bounds how
+# many poll loops can run at once so a burst of addrepo/reindex calls doesn't
+# pile concurrent polling onto the API.
+active_indexing: Dict[Tuple[str, str, str, str], asyncio.Task] = {}
+indexing_semaphore = asyncio.Semaphore(8)
+
+def start_indexing_watch(ctx: commands.Context, status_message: discord.Message, repo: Tuple[str, str, str, str], on_done=None) -> asyncio.Task:
+    """Watch indexing progress in a background task so command handlers return immediately."""
+    existing = active_indexing.get(repo)
+    if existing is not None and not existing.done():
+        return existing
+
+    async def watch():
+        async with indexing_semaphore:
+            status = await check_indexing_status(ctx, status_message, repo)
+            if on_done is not None:
+                await on_done(status)
+
+    task = asyncio.create_task(watch())
+    active_indexing[repo] = task
+    task.add_done_callback(lambda _: active_indexing.pop(repo, None))
+    return task
+
+async def index_repository(ctx: commands.Context, repo: Tuple[str, str, str, str], on_done=None) -> str:
     """
     Index a repository using the Greptile API.
 
     Args:
     ctx (commands.Context): The context of the command.
     repo (Tuple[str, str, str, str]): A tuple containing (remote, owner, name, branch) of the repository.
+    on_done: Optional coroutine function called with the final status once the
+        background indexing watch finishes.
 
     Returns:
-    str: The final status of the indexing process ('completed', 'failed', or 'processing').
+    str: 'started' when an indexing watch was launched in the background,
+    otherwise the immediate status ('completed', 'failed', or 'processing').
     """
     remote, owner, name, branch = repo
     
@@ -299,7 +745,7 @@ async def index_repository(ctx: commands.Context, repo: Tuple[str, str, str, str
     current_status_info = await get_repository_status(ctx, repo)
     
     if current_status_info is None:
-        await ctx.send(embed=discord.Embed(title="Error", description="Failed to retrieve repository status. Please try again later.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("Failed to retrieve repository status. Please try again later."))
         return 'failed'
 
     current_status = current_status_info['status']
@@ -311,12 +757,6 @@ async def index_repository(ctx: commands.Context, repo: Tuple[str, str, str, str
         # No need to send another embed, as get_repository_status already sent one
         return 'processing'
 
-    url = 'https://api.greptile.com/v2/repositories'
-    headers = {
-        'Authorization': f'Bearer {GREPTILE_API_KEY}',
-        'X-GitHub-Token': GITHUB_TOKEN,
-        'Content-Type': 'application/json'
-    }
     payload = {
         "remote": remote,
         "repository": f"{owner}/{name}",
@@ -328,194 +768,237 @@ async def index_repository(ctx: commands.Context, repo: Tuple[str, str, str, str
     status_embed = discord.Embed(title="Repository Indexing", description="Starting indexing process...", color=discord.Color.blue())
     status_message = await ctx.send(embed=status_embed)
 
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=CONFIG['API_TIMEOUT'])) as session:
-        for attempt in range(CONFIG['API_RETRIES']):
-            try:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    logger.info(f"Repository indexing response: {result['response']}")
-                    
-                    status_embed.description = f"Indexing started: {result['response']}"
-                    await status_message.edit(embed=status_embed)
+    try:
+        result = await greptile_post(REPOSITORIES_URL, payload, timeout=aiohttp.ClientTimeout(total=typed_config.api_timeout))
+    except aiohttp.ClientResponseError as e:
+        error_context = {
+            "status_code": e.status,
+            "request_info": str(e.request_info),
+            "headers": str(e.headers),
+        }
+        error_message = f"HTTP error occurred while indexing the repository: {e.status} - {e.message}"
+        logger.error(error_message)
+        logger.error("URL attempted: %s", REPOSITORIES_URL)
+        logger.error("Payload: %s", payload)
+        await report_error(error_message, error_context)
 
-                    # Start checking the indexing status
-                    return await check_indexing_status(ctx, status_message, repo)
+        status_embed.description = f"Failed to start indexing. HTTP Error: {e.status} - {e.message}"
+        status_embed.color = discord.Color.red()
+        await status_message.edit(embed=status_embed)
+        return 'failed'
+    except aiohttp.ClientError as e:
+        error_message = f"Client error occurred while indexing the repository: {str(e)}"
+        logger.error(error_message)
+        logger.error("URL attempted: %s", REPOSITORIES_URL)
+        logger.error("Payload: %s", payload)
+        await report_error(error_message)
 
-            except aiohttp.ClientResponseError as e:
-                error_context = {
-                    "status_code": e.status,
-                    "request_info": str(e.request_info),
-                    "headers": str(e.headers),
-                }
-                error_message = f"HTTP error occurred while indexing the repository: {e.status} - {e.message}"
-                logger.error(error_message)
-                logger.error(f"URL attempted: {url}")
-                logger.error(f"Payload: {payload}")
-                await report_error(error_message, error_context)
-                
-                if attempt == CONFIG['API_RETRIES'] - 1:
-                    status_embed.description = f"Failed to start indexing. HTTP Error: {e.status} - {e.message}"
-                    status_embed.color = discord.Color.red()
-                    await status_message.edit(embed=status_embed)
-                    return 'failed'
-                
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        status_embed.description = f"Failed to start indexing. Client Error: {str(e)}"
+        status_embed.color = discord.Color.red()
+        await status_message.edit(embed=status_embed)
+        return 'failed'
+    except Exception as e:
+        error_message = f"Unexpected error occurred while indexing the repository: {str(e)}"
+        logger.error(error_message)
+        logger.error("URL attempted: %s", REPOSITORIES_URL)
+        logger.error("Payload: %s", payload)
+        await report_error(error_message)
 
-            except aiohttp.ClientError as e:
-                error_message = f"Client error occurred while indexing the repository: {str(e)}"
-                logger.error(error_message)
-                logger.error(f"URL attempted: {url}")
-                logger.error(f"Payload: {payload}")
-                await report_error(error_message)
-                
-                if attempt == CONFIG['API_RETRIES'] - 1:
-                    status_embed.description = f"Failed to start indexing. Client Error: {str(e)}"
-                    status_embed.color = discord.Color.red()
-                    await status_message.edit(embed=status_embed)
-                    return 'failed'
-                
-                await asyncio.sleep(2 ** attempt)  # Exponential backoff
+        status_embed.description = f"Failed to start indexing. Unexpected Error: {str(e)}"
+        status_embed.color = discord.Color.red()
+        await status_message.edit(embed=status_embed)
+        return 'failed'
 
-            except Exception as e:
-                error_message = f"Unexpected error occurred while indexing the repository: {str(e)}"
-                logger.error(error_message)
-                logger.error(f"URL attempted: {url}")
-                logger.error(f"Payload: {payload}")
-                await report_error(error_message)
-                
-                status_embed.description = f"Failed to start indexing. Unexpected Error: {str(e)}"
-                status_embed.color = discord.Color.red()
-                await status_message.edit(embed=status_embed)
-                return 'failed'
+    logger.info("Repository indexing response: %s", result['response'])
+
+    status_embed.description = f"Indexing started: {result['response']}"
+    await status_message.edit(embed=status_embed)
+
+    # Watch the indexing progress in the background so this command handler
+    # isn't held for the whole indexing run.
+    start_indexing_watch(ctx, status_message, repo, on_done=on_done)
+    return 'started'
 
 async def check_indexing_status(ctx: commands.Context, status_message: discord.Message, repo: Tuple[str, str, str, str]) -> str:
     remote, owner, name, branch = repo
     repo_id = f"{remote}:{branch}:{owner}/{name}"
 
-    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=CONFIG['API_TIMEOUT'])) as session:
-        start_time = datetime.now()
-        while True:
-            try:
-                status_info = await get_repository_status(ctx, repo)
-                
-                if status_info is None:
-                    status_embed = discord.Embed(title="Error", description="Failed to retrieve repository status. Please check manually.", color=discord.Color.red())
-                    await status_message.edit(embed=status_embed)
-                    return 'failed'
+    # Poll with exponential backoff: quick checks right after submission so
+    # short indexes finish promptly, backing off towards one check a minute
+    # while the status stays unchanged.
+    delay = 2.0
+    last_status = None
+    last_progress = None
+    last_desc = None
+    start_time = time.monotonic()
+    while True:
+        try:
+            status_info = await get_repository_status(ctx, repo, ttl=0, announce=False)
 
-                status = status_info['status']
-                status_embed = status_message.embeds[0]
+            if status_info is None:
+                status_embed = error_embed("Failed to retrieve repository status. Please check manually.")
+                await status_message.edit(embed=status_embed)
+                return 'failed'
+
+            status = status_info['status']
+            status_embed = status_message.embeds[0]
                 
-                if status == 'completed':
-                    status_embed.description = "Repository indexing completed successfully."
-                    status_embed.color = discord.Color.green()
-                    await status_message.edit(embed=status_embed)
-                    return 'completed'
-                elif status == 'failed':
-                    status_embed.description = "Repository indexing failed."
-                    status_embed.color = discord.Color.red()
-                    await status_message.edit(embed=status_embed)
-                    return 'failed'
-                elif status in ['submitted', 'cloning', 'processing']:
-                    elapsed_time = (datetime.now() - start_time).total_seconds() / 60  # in minutes
-                    progress = status_info['filesProcessed'] / max(status_info['numFiles'], 1) * 100
+            if status == 'completed':
+                status_embed.description = "Repository indexing completed successfully."
+                status_embed.color = discord.Color.green()
+                await status_message.edit(embed=status_embed)
+                return 'completed'
+            elif status == 'failed':
+                status_embed.description = "Repository indexing failed."
+                status_embed.color = discord.Color.red()
+                await status_message.edit(embed=status_embed)
+                return 'failed'
+            elif status in ['submitted', 'cloning', 'processing']:
+                elapsed_time = (time.monotonic() - start_time) / 60  # in minutes
+                progress = status_info['filesProcessed'] / max(status_info['numFiles'], 1) * 100
                     
-                    status_descriptions = {
-                        'submitted': "Repository has been submitted for indexing.",
-                        'cloning': "Repository is being cloned.",
-                        'processing': "Repository is being processed and indexed."
-                    }
+                status_descriptions = {
+                    'submitted': "Repository has been submitted for indexing.",
+                    'cloning': "Repository is being cloned.",
+                    'processing': "Repository is being processed and indexed."
+                }
                     
-                    status_embed.description = (
-                        f"{status_descriptions[status]}\n"
-                        f"Status: {status.capitalize()}\n"
-                        f"Progress: {progress:.2f}%\n"
-                        f"Elapsed time: {elapsed_time:.2f} minutes"
-                    )
-                    status_embed.color = discord.Color.blue()
-                    status_embed.set_footer(text="This progress is based on the number of files processed.")
+                status_embed.description = (
+                    f"{status_descriptions[status]}\n"
+                    f"Status: {status.capitalize()}\n"
+                    f"Progress: {progress:.2f}%\n"
+                    f"Elapsed time: {elapsed_time:.2f} minutes"
+                )
+                status_embed.color = discord.Color.blue()
+                status_embed.set_footer(text="This progress is based on the number of files processed.")
+                # Editing a message is a rate-limited REST call; skip it when
+                # nothing the user can see has changed since the last push.
+                if status_embed.description != last_desc:
                     await status_message.edit(embed=status_embed)
-                else:
-                    logger.warning(f"Unknown repository status: {status}")
-                    status_embed.description = f"Unexpected status: {status}. Please check manually."
-                    status_embed.color = discord.Color.orange()
+                    last_desc = status_embed.description
+            else:
+                logger.warning("Unknown repository status: %s", status)
+                status_embed.description = f"Unexpected status: {status}. Please check manually."
+                status_embed.color = discord.Color.orange()
+                if status_embed.description != last_desc:
                     await status_message.edit(embed=status_embed)
+                    last_desc = status_embed.description
                 
-                await asyncio.sleep(60)  # Check every minute
-
-            except Exception as e:
-                error_message = f"Unexpected error occurred while checking repository status: {str(e)}"
-                logger.error(error_message)
-                await report_error(error_message)
-                return 'failed'
+            # Back off while nothing moves; either a status transition or
+            # an advance in filesProcessed counts as movement. A long index
+            # chewing through files keeps the quick cadence, while a stalled
+            # one converges to a poll a minute.
+            progress = status_info['filesProcessed']
+            if status == last_status and progress == last_progress:
+                delay = min(delay * 1.5, 60.0)
+            else:
+                delay = 2.0
+                last_status = status
+                last_progress = progress
+            await asyncio.sleep(delay)
 
-async def report_error(error_message: str):
+        except Exception as e:
+            error_message = f"Unexpected error occurred while checking repository status: {str(e)}"
+            logger.error(error_message)
+            await report_error(error_message)
+            return 'failed'
+
+# Recently reported error hashes mapped to their suppression expiry time.
+# Bounded so a pathological error storm can't grow it without limit.
+recent_errors: Dict[int, float] = {}
+ERROR_DEDUP_WINDOW = 300  # seconds
+MAX_RECENT_ERRORS = 256
+
+def is_error_suppressed(error_message: str) -> bool:
+    """True when report_error would drop this message as a recent duplicate."""
+    expiry = recent_errors.get(hash(error_message))
+    return expiry is not None and expiry > time.monotonic()
+
+async def report_error(error_message: str, context: Optional[Dict[str, Any]] = None):
     """
     Report an error to the designated error channel and the bot owner.
     Prevents duplicate error reports within a short time frame.
 
     Args:
     error_message (str): The error message to report.
+    context (Optional[Dict[str, Any]]): Extra key/value details to attach to the report.
     """
+    # Suppress any error already reported within the dedup window. Unlike a
+    # single last-message slot, this holds up under alternating errors.
+    # Nothing else is computed before this check, so a suppressed report
+    # costs one hash and a dict probe.
+    error_hash = hash(error_message)
+    now = time.monotonic()
+    expiry = recent_errors.get(error_hash)
+    if expiry is not None and expiry > now:
+        return
+
     current_time = datetime.now()
-    
-    # Initialize last_error_time and last_error_message if they don't exist
-    if not hasattr(report_error, 'last_error_time'):
-        report_error.last_error_time = None
-    if not hasattr(report_error, 'last_error_message'):
-        report_error.last_error_message = None
-
-    # Check if this error was recently reported
-    if report_error.last_error_time is not None and report_error.last_error_message is not None:
-        time_since_last_error = current_time - report_error.last_error_time
-        if time_since_last_error.total_seconds() < 300 and report_error.last_error_message == error_message:  # 5 minutes
-            return  # Skip reporting if it's the same error within 5 minutes
-
-    # Update the last error information
-    report_error.last_error_time = current_time
-    report_error.last_error_message = error_message
+    if len(recent_errors) >= MAX_RECENT_ERRORS:
+        for stale in [key for key, value in recent_errors.items() if value <= now]:
+            del recent_errors[stale]
+        while len(recent_errors) >= MAX_RECENT_ERRORS:
+            del recent_errors[next(iter(recent_errors))]
+    recent_errors[error_hash] = now + ERROR_DEDUP_WINDOW
 
     # Prepare the error embed
-    error_embed = discord.Embed(
+    report_embed = discord.Embed(
         title="Error Report",
         description=error_message,
-        color=discord.Color.red(),
+        color=ERROR_RED,
         timestamp=current_time
     )
+    if context:
+        report_embed.add_field(
+            name="Context",
+            value="\n".join(f"{key}: {value}" for key, value in context.items())[:MAX_EMBED_FIELD_VALUE_LENGTH],
+            inline=False
+        )
 
     # Send to error channel if configured
-    error_channel_id = CONFIG.get('error_channel')
+    error_channel_id = typed_config.error_channel
     if error_channel_id:
-        channel = bot.get_channel(int(error_channel_id))
+        channel = get_cached_channel(error_channel_id)
         if channel:
             try:
-                await channel.send(embed=error_embed)
+                await channel.send(embed=report_embed)
             except discord.errors.Forbidden:
-                logger.error(f"Bot doesn't have permission to send messages in the error channel (ID: {error_channel_id})")
+                logger.error("Bot doesn't have permission to send messages in the error channel (ID: %s)", error_channel_id)
             except Exception as e:
-                logger.error(f"Failed to send error message to error channel: {str(e)}")
+                logger.error("Failed to send error message to error channel: %s", e)
     
     # Send to bot owner
     try:
-        owner = await bot.fetch_user(int(BOT_OWNER_ID))
+        owner = await bot.fetch_user(BOT_OWNER_ID)
         if owner:
-            await owner.send(embed=error_embed)
+            await owner.send(embed=report_embed)
     except discord.errors.NotFound:
-        logger.error(f"Bot owner with ID {BOT_OWNER_ID} not found")
+        logger.error("Bot owner with ID %s not found", BOT_OWNER_ID)
     except discord.errors.Forbidden:
         logger.error("Bot doesn't have permission to send DM to the owner")
     except Exception as e:
-        logger.error(f"Failed to send error message to bot owner: {str(e)}")
+        logger.error("Failed to send error message to bot owner: %s", e)
 
     # Log the error
-    logger.error(f"Error reported: {error_message}")
+    logger.error("Error reported: %s", error_message)
+
+# Resolved channel objects keyed by ID, so every error report / log line is
+# an attribute read instead of a channel-map walk.
+channel_cache: Dict[int, Any] = {}
+
+def get_cached_channel(channel_id: int):
+    channel = channel_cache.get(channel_id)
+    if channel is None:
+        channel = bot.get_channel(channel_id)
+        if channel is not None:
+            channel_cache[channel_id] = channel
+    return channel
 
 async def log_to_channel(guild_id: int, embed: discord.Embed):
     """Log an embed to the designated log channel."""
-    log_channel_id = CONFIG.get('log_channel')
+    log_channel_id = typed_config.log_channel
     if log_channel_id:
-        channel = bot.get_channel(int(log_channel_id))
+        channel = get_cached_channel(log_channel_id)
         if channel:
             await channel.send(embed=embed)
 
@@ -547,7 +1030,7 @@ async def greptilehelp(ctx: commands.Context):
 
     embed.add_field(
         name="Usage Limits",
-        value=f"- You can make up to {CONFIG.get('MAX_QUERIES_PER_DAY', 5)} regular queries and {CONFIG.get('MAX_SMART_QUERIES_PER_DAY', 1)} smart queries per day.\n"
+        value=f"- You can make up to {typed_config.max_queries} regular queries and {typed_config.max_smart_queries} smart queries per day.\n"
             f"- Only whitelisted users can use these commands.",
         inline=False
     )
@@ -556,7 +1039,7 @@ async def greptilehelp(ctx: commands.Context):
     await ctx.send(embed=embed)
 
 @bot.command(name='search')
-@is_whitelisted(UserRole.USER)
+@gated('search')
 async def search(ctx: commands.Context, *, search_query: str):
     """
     Search for relevant code in the repository.
@@ -566,84 +1049,85 @@ async def search(ctx: commands.Context, *, search_query: str):
     query_id = f"{ctx.author.id}-{ctx.channel.id}"
 
     if query_id in active_queries:
-        await ctx.send(embed=discord.Embed(title="Error", description="You already have a pending search. Please wait for it to complete.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("You already have a pending search. Please wait for it to complete."))
         return
 
-    current_time = time.time()
-    if current_time - last_query_time[ctx.author.id] < COOLDOWN_TIME:
-        cooldown_left = COOLDOWN_TIME - (current_time - last_query_time[ctx.author.id])
+    current_time = time.monotonic()
+    cooldown_left = cooldown_remaining(ctx.author.id, current_time)
+    if cooldown_left > 0:
         await ctx.send(embed=discord.Embed(title="Cooldown", description=f"Please wait {cooldown_left:.1f} seconds before making another search.", color=discord.Color.orange()))
         return
 
-    if not await can_make_query(ctx.author.id, 'search'):
-        await ctx.send(embed=discord.Embed(title="Error", description="You have reached the maximum number of searches for today.", color=discord.Color.red()))
-        return
-
     active_queries.add(query_id)
-    last_query_time[ctx.author.id] = current_time
+    touch_cooldown(ctx.author.id, current_time)
 
-    # Send initial response
+    # Send initial response, then run the search in a background task so the
+    # command handler returns as soon as the ack is visible.
     initial_embed = discord.Embed(title="Processing Search", description="Your search query is being processed. Please wait...", color=discord.Color.blue())
     message = await ctx.send(embed=initial_embed)
+    asyncio.create_task(run_search(ctx, message, search_query, query_id))
+
+# Search API calls still in flight, keyed by the query string. Unlike
+# queries, a search payload carries no conversation state, so any two
+# identical searches can safely share one response.
+pending_search_calls: Dict[str, asyncio.Task] = {}
 
+async def run_search(ctx: commands.Context, message: discord.Message, search_query: str, query_id: str):
     try:
-        repos = await get_repos()
-        if not repos:
-            await message.edit(embed=discord.Embed(title="Error", description="No repositories indexed. Please add a repository first.", color=discord.Color.red()))
+        repos_payload = await get_repos_payload()
+        if not repos_payload:
+            await message.edit(embed=error_embed("No repositories indexed. Please add a repository first."))
             return
 
-        url = 'https://api.greptile.com/v2/search'
-        headers = {
-            'Authorization': f'Bearer {GREPTILE_API_KEY}',
-            'X-GitHub-Token': GITHUB_TOKEN,
-            'Content-Type': 'application/json'
-        }
         payload = {
             "query": search_query,
-            "repositories": [
-                {
-                    "remote": repo[0],
-                    "repository": f"{repo[1]}/{repo[2]}",
-                    "branch": repo[3]
-                } for repo in repos
-            ],
+            "repositories": repos_payload,
             "sessionId": f"discord-search-{ctx.author.id}-{ctx.message.id}",
             "stream": False
         }
 
-        async with aiohttp.ClientSession() as session:
-            start_time = datetime.now()
-            results = await make_api_call(session, url, payload, headers)
-            end_time = datetime.now()
-            response_time = (end_time - start_time).total_seconds()
-
-            if not results:
-                await message.edit(embed=discord.Embed(title="Search Results", description="No results found for your query.", color=discord.Color.blue()))
-                return
-
-            embeds = []
-            current_embed = discord.Embed(title="Search Results", color=discord.Color.green())
-            for i, result in enumerate(results, 1):
-                current_embed.add_field(
-                    name=f"{result['filepath']} (lines {result['linestart']}-{result['lineend']})",
-                    value=f"Summary: {result['summary'][:100]}...",
-                    inline=False
-                )
-                if len(current_embed.fields) >= 25:  # Discord's limit is 25 fields per embed
-                    embeds.append(current_embed)
-                    current_embed = discord.Embed(title=f"Search Results (cont.)", color=discord.Color.green())
-
-            if current_embed.fields:
-                embeds.append(current_embed)
-
-            embeds[-1].add_field(name="Response Time", value=f"{response_time:.2f} seconds", inline=False)
-
-            await message.edit(embed=embeds[0])
-            for embed in embeds[1:]:
-                await ctx.send(embed=embed)
+        start_time = time.monotonic()
+        call = pending_search_calls.get(search_query)
+        if call is None or call.done():
+            call = asyncio.ensure_future(make_api_call(SEARCH_URL, payload))
+            pending_search_calls[search_query] = call
+            call.add_done_callback(lambda _: pending_search_calls.pop(search_query, None))
+        results = await call
+        response_time = time.monotonic() - start_time
+
+        if not results:
+            await message.edit(embed=discord.Embed(title="Search Results", description="No results found for your query.", color=discord.Color.blue()))
+            return
 
-            user_queries[ctx.author.id]['search'].append(datetime.now())
-            await log_to_channel(ctx.guild.id, embeds[0])
+        # Build the embeds from plain dicts in one shot; from_dict skips the
+        # per-call mutation path that add_field takes for every result.
+        fields = [
+            {
+                "name": f"{result['filepath']} (lines {result['linestart']}-{result['lineend']})",
+                "value": f"Summary: {result['summary'][:100]}...",
+                "inline": False
+            }
+            for result in results
+        ]
+        fields.append({"name": "Response Time", "value": f"{response_time:.2f} seconds", "inline": False})
+
+        embeds = [
+            discord.Embed.from_dict({
+                "title": "Search Results" if start == 0 else "Search Results (cont.)",
+                "color": SUCCESS_GREEN.value,
+                "fields": fields[start:start + 25]  # Discord's limit is 25 fields per embed
+            })
+            for start in range(0, len(fields), 25)
+        ]
+
+        # Edit the first message for ordering, then fan the rest out
+        # concurrently; discord.py queues them through its own rate limiter.
+        await message.edit(embed=embeds[0])
+        if len(embeds) > 1:
+            await asyncio.gather(*(ctx.send(embed=embed) for embed in embeds[1:]))
+
+        record_query(ctx.author.id, 'search')
+        await log_to_channel(ctx.guild.id, embeds[0])
 
     except Exception as e:
         await handle_api_error(ctx, message, e)
@@ -651,29 +1135,59 @@ async def search(ctx: commands.Context, *, search_query: str):
         active_queries.remove(query_id)
 
 class PaginationView(View):
-    def __init__(self, embeds):
+    """Paginated embeds where each page is built on first view.
+
+    Most answers fit a single page and most readers never leave page 0, so
+    pages are constructed on demand from a builder callback and memoized
+    instead of being allocated up front.
+    """
+    def __init__(self, page_count, build_page):
         super().__init__(timeout=300)
-        self.embeds = embeds
+        self.page_count = page_count
+        self.build_page = build_page
         self.current_page = 0
+        self._pages: Dict[int, discord.Embed] = {}
+
+    def page(self, index: int) -> discord.Embed:
+        embed = self._pages.get(index)
+        if embed is None:
+            embed = self.build_page(index)
+            self._pages[index] = embed
+        return embed
 
     @discord.ui.button(label="Previous", style=discord.ButtonStyle.grey)
     async def previous_button(self, interaction: discord.Interaction, button: Button):
         if self.current_page > 0:
             self.current_page -= 1
-            await interaction.response.edit_message(embed=self.embeds[self.current_page], view=self)
+            await interaction.response.edit_message(embed=self.page(self.current_page), view=self)
 
     @discord.ui.button(label="Next", style=discord.ButtonStyle.grey)
     async def next_button(self, interaction: discord.Interaction, button: Button):
-        if self.current_page < len(self.embeds) - 1:
+        if self.current_page < self.page_count - 1:
             self.current_page += 1
-            await interaction.response.edit_message(embed=self.embeds[self.current_page], view=self)
+            await interaction.response.edit_message(embed=self.page(self.current_page), view=self)
 
 def split_text(text, max_length):
-    """Split text into chunks of maximum length."""
-    return [text[i:i+max_length] for i in range(0, len(text), max_length)]
+    """Yield successive chunks of text no longer than max_length.
+
+    Chunks prefer to break at a newline so pages don't split mid-line;
+    str.rfind does the scan in C rather than a Python-level loop.
+    """
+    start = 0
+    length = len(text)
+    while start < length:
+        end = start + max_length
+        if end >= length:
+            yield text[start:]
+            return
+        cut = text.rfind('\n', start, end)
+        if cut > start:
+            end = cut + 1
+        yield text[start:end]
+        start = end
         
 @bot.command(name='query')
-@is_whitelisted(UserRole.USER)
+@gated('queries')
 async def query(ctx: commands.Context, *, question: str):
     """
     Ask a question about the codebase and get a detailed answer.
@@ -683,7 +1197,7 @@ async def query(ctx: commands.Context, *, question: str):
     await process_query(ctx, question, False)
 
 @bot.command(name='smartquery')
-@is_whitelisted(UserRole.USER)
+@gated('smart_queries')
 async def smartquery(ctx: commands.Context, *, question: str):
     """
     Ask a more complex question using the 'genius' feature for more detailed analysis.
@@ -701,40 +1215,79 @@ async def process_query(ctx: commands.Context, question: str, genius: bool):
 
     # Check for concurrent queries
     if query_id in active_queries:
-        await ctx.send(embed=discord.Embed(title="Error", description="You already have a pending query. Please wait for it to complete.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("You already have a pending query. Please wait for it to complete."))
         return
 
     # Check for cooldown
-    current_time = time.time()
-    if current_time - last_query_time[ctx.author.id] < COOLDOWN_TIME:
-        cooldown_left = COOLDOWN_TIME - (current_time - last_query_time[ctx.author.id])
+    current_time = time.monotonic()
+    cooldown_left = cooldown_remaining(ctx.author.id, current_time)
+    if cooldown_left > 0:
         await ctx.send(embed=discord.Embed(title="Cooldown", description=f"Please wait {cooldown_left:.1f} seconds before making another query.", color=discord.Color.orange()))
         return
 
-    # Check daily limit
-    if not await can_make_query(ctx.author.id, query_type):
-        await ctx.send(embed=discord.Embed(title="Error", description=f"You have reached the maximum number of {'smart ' if genius else ''}queries for today.", color=discord.Color.red()))
-        return
-
     active_queries.add(query_id)
-    last_query_time[ctx.author.id] = current_time
+    touch_cooldown(ctx.author.id, current_time)
 
-    # Send initial response
+    # Send initial response, then do the API work in a background task so the
+    # command handler returns as soon as the ack is visible.
     initial_embed = discord.Embed(title="Processing Query", description="Your query is being processed. Please wait...", color=discord.Color.blue())
     message = await ctx.send(embed=initial_embed)
+    asyncio.create_task(run_query(ctx, message, question, genius, query_type, query_id))
+
+# Query API calls still in flight, keyed by (question, genius). When several
+# users ask the same thing at once, the later arrivals await the first call's
+# result instead of paying their own round-trip. Entries clear on completion,
+# so answers are never served stale.
+pending_query_calls: Dict[Tuple[str, bool], asyncio.Task] = {}
 
+# Minimum gap between progress edits while streaming an answer. Message
+# edits are rate-limited REST calls, so partial text is pushed at most this
+# often regardless of how fast chunks arrive.
+STREAM_EDIT_INTERVAL = 1.5  # seconds
+
+async def stream_query_result(session: aiohttp.ClientSession, payload: Dict[str, Any], on_progress=None) -> Dict[str, Any]:
+    """
+    POST a streaming query and assemble the full response from its chunks.
+
+    The streamed body is a sequence of JSON lines; message chunks are
+    concatenated in order and the sources block is captured when it arrives.
+    When on_progress is given it is awaited with the accumulated text, rate
+    limited by STREAM_EDIT_INTERVAL, so the caller can surface the partial
+    answer while the rest is still being generated.
+    """
+    message_parts: List[str] = []
+    sources: List[Dict[str, Any]] = []
+    last_push = 0.0
+    async with greptile_semaphore, session.post(QUERY_URL, data=json_dumps_bytes(payload), headers=JSON_HEADERS, timeout=aiohttp.ClientTimeout(total=typed_config.api_timeout)) as response:
+        response.raise_for_status()
+        async for raw in response.content:
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                chunk = json_loads(line)
+            except ValueError:
+                logger.warning("Skipping unparseable stream chunk: %s", line[:200])
+                continue
+            kind = chunk.get('type')
+            if kind == 'message':
+                message_parts.append(chunk.get('message', ''))
+            elif kind == 'sources':
+                sources = chunk.get('sources', [])
+            if on_progress is not None and message_parts:
+                now = time.monotonic()
+                if now - last_push >= STREAM_EDIT_INTERVAL:
+                    last_push = now
+                    await on_progress(''.join(message_parts))
+    return {'message': ''.join(message_parts), 'sources': sources}
+
+async def run_query(ctx: commands.Context, message: discord.Message, question: str, genius: bool, query_type: str, query_id: str):
     try:
-        repos = await get_repos()
-        if not repos:
-            await message.edit(embed=discord.Embed(title="Error", description="No repositories indexed. Please add a repository first.", color=discord.Color.red()))
+        repos_payload = await get_repos_payload()
+        if not repos_payload:
+            await message.edit(embed=error_embed("No repositories indexed. Please add a repository first."))
             return
 
-        url = 'https://api.greptile.com/v2/query'
-        headers = {
-            'Authorization': f'Bearer {GREPTILE_API_KEY}',
-            'X-GitHub-Token': GITHUB_TOKEN,
-            'Content-Type': 'application/json'
-        }
         payload = {
             "messages": [
                 {
@@ -743,58 +1296,85 @@ async def process_query(ctx: commands.Context, question: str, genius: bool):
                     "role": "user"
                 }
             ],
-            "repositories": [
-                {
-                    "remote": repo[0],
-                    "repository": f"{repo[1]}/{repo[2]}",
-                    "branch": repo[3]
-                } for repo in repos
-            ],
+            "repositories": repos_payload,
             "sessionId": f"discord-query-{ctx.author.id}-{ctx.message.id}",
-            "stream": False,
+            "stream": True,
             "genius": genius
         }
 
-        async with aiohttp.ClientSession() as session:
-            start_time = datetime.now()
-            result = await make_api_call(session, url, payload, headers)
-            end_time = datetime.now()
-            response_time = (end_time - start_time).total_seconds()
-
-            # Split the response into multiple embeds if necessary
-            embeds = []
-            chunks = split_text(result['message'], MAX_EMBED_DESCRIPTION_LENGTH)
-            
-            for i, chunk in enumerate(chunks):
-                embed = discord.Embed(title=f"Query Result (Page {i+1}/{len(chunks)})", description=chunk, color=discord.Color.green())
-                if i == len(chunks) - 1:  # Add sources and response time to the last embed
-                    if 'sources' in result:
-                        sources = result['sources']
-                        source_chunks = []
-                        current_chunk = ""
-                        for source in sources:
-                            source_text = f"- {source['filepath']} (lines {source['linestart']}-{source['lineend']})\n"
-                            if len(current_chunk) + len(source_text) > MAX_EMBED_FIELD_VALUE_LENGTH:
-                                source_chunks.append(current_chunk)
-                                current_chunk = source_text
-                            else:
-                                current_chunk += source_text
-                        if current_chunk:
-                            source_chunks.append(current_chunk)
+        async def on_progress(partial: str):
+            # Show the tail of the answer so far; the full paginated render
+            # replaces this once the stream completes.
+            preview = partial[-MAX_EMBED_DESCRIPTION_LENGTH:]
+            try:
+                await message.edit(embed=discord.Embed(title="Query Result (streaming)", description=preview, color=discord.Color.blue()))
+            except discord.HTTPException:
+                pass  # a dropped progress edit shouldn't abort the stream
+
+        start_time = time.monotonic()
+        call_key = (question, genius)
+        call = pending_query_calls.get(call_key)
+        if call is None or call.done():
+            session = await get_http_session()
+            call = asyncio.ensure_future(stream_query_result(session, payload, on_progress=on_progress))
+            pending_query_calls[call_key] = call
+            call.add_done_callback(lambda _: pending_query_calls.pop(call_key, None))
+        result = await call
+        response_time = time.monotonic() - start_time
+
+        # Materialized here because the page headers need the total count;
+        # consumers that don't can iterate the generator directly.
+        chunks = list(split_text(result['message'], MAX_EMBED_DESCRIPTION_LENGTH))
+
+        def build_page(i: int) -> discord.Embed:
+            embed = discord.Embed(title=f"Query Result (Page {i+1}/{len(chunks)})", description=chunks[i], color=SUCCESS_GREEN)
+            if i == len(chunks) - 1:  # Add sources and response time to the last embed
+                if 'sources' in result:
+                    sources = result['sources']
+                    source_chunks = []
+                    # Accumulate lines in a list with a running length and
+                    # join once per page: += on a growing string recopies
+                    # the whole prefix for every source.
+                    buf: List[str] = []
+                    buf_len = 0
+                    # Discord rejects embeds past 25 fields; keep a slot for
+                    # the response time and stop paginating sources there
+                    # instead of having the whole embed bounced.
+                    max_source_pages = 24
+                    # itemgetter pulls the three keys per source in one
+                    # C-level call; the loop below then touches locals only.
+                    get_location = operator.itemgetter('filepath', 'linestart', 'lineend')
+                    for filepath, linestart, lineend in map(get_location, sources):
+                        source_text = f"- {filepath} (lines {linestart}-{lineend})\n"
+                        if buf_len + len(source_text) > MAX_EMBED_FIELD_VALUE_LENGTH:
+                            source_chunks.append("".join(buf))
+                            if len(source_chunks) >= max_source_pages:
+                                buf = []
+                                break
+                            buf = [source_text]
+                            buf_len = len(source_text)
+                        else:
+                            buf.append(source_text)
+                            buf_len += len(source_text)
+                    if buf and len(source_chunks) < max_source_pages:
+                        source_chunks.append("".join(buf))
                         
-                        for j, source_chunk in enumerate(source_chunks):
-                            embed.add_field(name=f"Sources (Page {j+1}/{len(source_chunks)})", value=source_chunk, inline=False)
+                    for j, source_chunk in enumerate(source_chunks):
+                        embed.add_field(name=f"Sources (Page {j+1}/{len(source_chunks)})", value=source_chunk, inline=False)
 
-                    embed.add_field(name="Response Time", value=f"{response_time:.2f} seconds", inline=False)
-                embeds.append(embed)
+                embed.add_field(name="Response Time", value=f"{response_time:.2f} seconds", inline=False)
+            return embed
 
-            # Send the first embed with pagination view
-            view = PaginationView(embeds)
-            await message.edit(embed=embeds[0], view=view)
+        # Send the first page with the pagination view; later pages (and, on
+        # multi-page answers, the sources rendering) are built only if a
+        # reader actually pages to them.
+        view = PaginationView(len(chunks), build_page)
+        first_page = view.page(0)
+        await message.edit(embed=first_page, view=view)
 
-            await log_to_channel(ctx.guild.id, embeds[0])
+        await log_to_channel(ctx.guild.id, first_page)
 
-            user_queries[ctx.author.id][query_type].append(datetime.now())
+        record_query(ctx.author.id, query_type)
 
     except Exception as e:
         await handle_api_error(ctx, message, e)
@@ -814,14 +1394,15 @@ async def list_repos(ctx: commands.Context):
         return
 
     embed = discord.Embed(title="Indexed Repositories", color=discord.Color.blue())
-    for repo in repos:
+    for position, repo in enumerate(repos, 1):
         remote, owner, name, branch = repo
-        embed.add_field(name=f"{owner}/{name}", value=f"Remote: {remote}\nBranch: {branch}", inline=False)
+        embed.add_field(name=f"{position}. {owner}/{name}", value=f"Remote: {remote}\nBranch: {branch}", inline=False)
     
     await ctx.send(embed=embed)
 
 @bot.command(name='addrepo')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler()
 async def add_repo(ctx: commands.Context, remote: str, repository: str, branch: str = None):
     """
     Add and index a new repository.
@@ -831,70 +1412,53 @@ async def add_repo(ctx: commands.Context, remote: str, repository: str, branch:
     try:
         owner, name = repository.split('/')
     except ValueError:
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid repository format. Use 'owner/name'.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("Invalid repository format. Use 'owner/name'."))
         return
 
     if branch is None:
-        branch = CONFIG.get('DEFAULT_BRANCH', 'main')
-
-    try:
-        async with db_transaction() as cur:
-            # Check if the repository already exists
-            await cur.execute("SELECT * FROM repos WHERE remote=? AND owner=? AND name=? AND branch=?", (remote, owner, name, branch))
-            if await cur.fetchone():
-                await ctx.send(embed=discord.Embed(title="Error", description="This repository is already indexed.", color=discord.Color.red()))
-                return
-
-            # Add the repository to the database
-            await cur.execute("INSERT INTO repos (remote, owner, name, branch) VALUES (?, ?, ?, ?)",
-                            (remote, owner, name, branch))
-
-        await ctx.send(embed=discord.Embed(title="Repository Added", description="Repository has been added to the database. Starting indexing process...", color=discord.Color.green()))
-        
-        # Start indexing process
-        status = await index_repository(ctx, (remote, owner, name, branch))
+        branch = typed_config.default_branch
+
+    async with db_transaction() as cur:
+        # The unique index turns the duplicate check into part of the
+        # insert itself: one statement and one journal sync where the
+        # old SELECT-then-INSERT pair held the transaction across two.
+        result = await cur.execute("INSERT OR IGNORE INTO repos (remote, owner, name, branch) VALUES (?, ?, ?, ?)",
+                        (remote, owner, name, branch))
+        already_indexed = result.rowcount == 0
+    if already_indexed:
+        await ctx.send(embed=error_embed("This repository is already indexed."))
+        return
+    invalidate_repo_cache()
 
-        # Check the indexing result
+    await ctx.send(embed=discord.Embed(title="Repository Added", description="Repository has been added to the database. Starting indexing process...", color=discord.Color.green()))
+    
+    async def on_indexing_done(status: str):
         if status != 'completed':
             # If indexing failed, remove the repository from the database
             async with db_transaction() as cur:
                 await cur.execute("DELETE FROM repos WHERE remote=? AND owner=? AND name=? AND branch=?", (remote, owner, name, branch))
+            invalidate_repo_cache()
             await ctx.send(embed=discord.Embed(title="Repository Removed", description="Repository indexing failed and has been removed from the database.", color=discord.Color.red()))
         else:
             await ctx.send(embed=discord.Embed(title="Repository Indexed", description="Repository has been successfully indexed and is ready for use.", color=discord.Color.green()))
 
-    except sqlite3.Error as e:
-        error_message = f"Database error in add_repo: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in add_repo: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred. Please try again later.", color=discord.Color.red()))
+    # Start indexing; the watch task reports the outcome once it finishes
+    status = await index_repository(ctx, (remote, owner, name, branch), on_done=on_indexing_done)
+    if status != 'started':
+        await on_indexing_done(status)
 
 @bot.command(name='removerepos')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler("removing repositories")
 async def remove_repos(ctx: commands.Context):
     """
     Remove all indexed repositories.
     Usage: ~removerepos
     """
-    try:
-        async with db_transaction() as cur:
-            await cur.execute("DELETE FROM repos")
-        await ctx.send(embed=discord.Embed(title="Repositories Removed", description="All repositories have been removed from the index.", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in remove_repos: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while removing repositories. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in remove_repos: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while removing repositories. Please try again later.", color=discord.Color.red()))
+    async with db_transaction() as cur:
+        await cur.execute("DELETE FROM repos")
+    invalidate_repo_cache()
+    await ctx.send(embed=discord.Embed(title="Repositories Removed", description="All repositories have been removed from the index.", color=discord.Color.green()))
 
 @bot.command(name='setconfig')
 @is_whitelisted(UserRole.ADMIN)
@@ -917,208 +1481,201 @@ async def list_whitelist(ctx: commands.Context):
     Usage: ~listwhitelist
     """
     try:
-        async with db_pool.acquire() as conn:
-            async with conn.execute("SELECT user_id, role FROM whitelist") as cursor:
-                whitelist = await cursor.fetchall()
-        
+        # The in-memory cache mirrors the whitelist table, so listing it
+        # doesn't need a database round-trip.
         embed = discord.Embed(title="Whitelisted Users", color=discord.Color.blue())
-        for user_id, role in whitelist:
-            embed.add_field(name=user_id, value=role, inline=False)
+        for user_id, role in whitelist_cache.items():
+            embed.add_field(name=str(user_id), value=role.db_value, inline=False)
         
         await ctx.send(embed=embed)
-    except sqlite3.Error as e:
-        error_message = f"Database error in list_whitelist: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while fetching the whitelist. Please try again later.", color=discord.Color.red()))
     except Exception as e:
         error_message = f"Unexpected error in list_whitelist: {str(e)}"
         logger.error(error_message)
         await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while fetching the whitelist. Please try again later.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("An unexpected error occurred while fetching the whitelist. Please try again later."))
 
 @bot.command(name='addwhitelist')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler("updating the whitelist")
 async def add_whitelist(ctx: commands.Context, user_id: str):
     """
     Add a user to the whitelist.
     Usage: ~addwhitelist <user_id>
     Example: ~addwhitelist 123456789
     """
-    if not user_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid user ID. Please provide a valid Discord user ID.", color=discord.Color.red()))
+    uid = parse_snowflake(user_id)
+    if uid is None:
+        await ctx.send(embed=ERR_INVALID_USER_ID)
         return
 
-    try:
-        async with db_transaction() as cur:
-            await cur.execute("INSERT OR REPLACE INTO whitelist (user_id, role) VALUES (?, ?)", (user_id, UserRole.USER.value))
-        await ctx.send(embed=discord.Embed(title="Whitelist Updated", description=f"User {user_id} added to whitelist.", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in add_whitelist: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while updating the whitelist. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in add_whitelist: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while updating the whitelist. Please try again later.", color=discord.Color.red()))
+    # The cache mirrors the table, so a no-op write can be answered without
+    # opening a transaction at all.
+    if whitelist_cache.get(uid) is UserRole.USER:
+        await ctx.send(embed=discord.Embed(title="Whitelist Update", description=f"User {user_id} is already whitelisted.", color=discord.Color.yellow()))
+        return
+
+    async with db_transaction() as cur:
+        await cur.execute("INSERT OR REPLACE INTO whitelist (user_id, role) VALUES (?, ?)", (uid, UserRole.USER.db_value))
+    whitelist_cache[uid] = UserRole.USER
+    await ctx.send(embed=discord.Embed(title="Whitelist Updated", description=f"User {user_id} added to whitelist.", color=discord.Color.green()))
 
 @bot.command(name='removewhitelist')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler("updating the whitelist")
 async def remove_whitelist(ctx: commands.Context, user_id: str):
     """
     Remove a user from the whitelist.
     Usage: ~removewhitelist <user_id>
     Example: ~removewhitelist 123456789
     """
-    if not user_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid user ID. Please provide a valid Discord user ID.", color=discord.Color.red()))
+    uid = parse_snowflake(user_id)
+    if uid is None:
+        await ctx.send(embed=ERR_INVALID_USER_ID)
         return
 
-    try:
-        async with db_transaction() as cur:
-            result = await cur.execute("DELETE FROM whitelist WHERE user_id = ?", (user_id,))
-            if result.rowcount == 0:
-                await ctx.send(embed=discord.Embed(title="Whitelist Update", description=f"User {user_id} was not in the whitelist.", color=discord.Color.yellow()))
-            else:
-                await ctx.send(embed=discord.Embed(title="Whitelist Updated", description=f"User {user_id} removed from whitelist.", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in remove_whitelist: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while updating the whitelist. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in remove_whitelist: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while updating the whitelist. Please try again later.", color=discord.Color.red()))
+    async with db_transaction() as cur:
+        result = await cur.execute("DELETE FROM whitelist WHERE user_id = ?", (uid,))
+        if result.rowcount > 0:
+            whitelist_cache.pop(uid, None)
+        if result.rowcount == 0:
+            await ctx.send(embed=discord.Embed(title="Whitelist Update", description=f"User {user_id} was not in the whitelist.", color=discord.Color.yellow()))
+        else:
+            await ctx.send(embed=discord.Embed(title="Whitelist Updated", description=f"User {user_id} removed from whitelist.", color=discord.Color.green()))
 
 @bot.command(name='addadmin')
 @is_whitelisted(UserRole.OWNER)
+@command_errorhandler("promoting the user to admin")
 async def add_admin(ctx: commands.Context, user_id: str):
     """
     Promote a user to admin.
     Usage: ~addadmin <user_id>
     Example: ~addadmin 123456789
     """
-    if not user_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid user ID. Please provide a valid Discord user ID.", color=discord.Color.red()))
+    uid = parse_snowflake(user_id)
+    if uid is None:
+        await ctx.send(embed=ERR_INVALID_USER_ID)
         return
 
-    try:
-        async with db_transaction() as cur:
-            await cur.execute("INSERT OR REPLACE INTO whitelist (user_id, role) VALUES (?, ?)", (user_id, UserRole.ADMIN.value))
-        await ctx.send(embed=discord.Embed(title="Admin Added", description=f"User {user_id} promoted to admin.", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in add_admin: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while promoting the user to admin. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in add_admin: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while promoting the user to admin. Please try again later.", color=discord.Color.red()))
+    if whitelist_cache.get(uid) is UserRole.ADMIN:
+        await ctx.send(embed=discord.Embed(title="Admin Update", description=f"User {user_id} is already an admin.", color=discord.Color.yellow()))
+        return
+
+    async with db_transaction() as cur:
+        await cur.execute("INSERT OR REPLACE INTO whitelist (user_id, role) VALUES (?, ?)", (uid, UserRole.ADMIN.db_value))
+    whitelist_cache[uid] = UserRole.ADMIN
+    await ctx.send(embed=discord.Embed(title="Admin Added", description=f"User {user_id} promoted to admin.", color=discord.Color.green()))
 
 @bot.command(name='removeadmin')
 @is_whitelisted(UserRole.OWNER)
+@command_errorhandler("demoting the admin")
 async def remove_admin(ctx: commands.Context, user_id: str):
     """
     Demote an admin to regular user.
     Usage: ~removeadmin <user_id>
     Example: ~removeadmin 123456789
     """
-    if not user_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid user ID. Please provide a valid Discord user ID.", color=discord.Color.red()))
+    uid = parse_snowflake(user_id)
+    if uid is None:
+        await ctx.send(embed=ERR_INVALID_USER_ID)
         return
 
-    try:
-        async with db_transaction() as cur:
-            result = await cur.execute("UPDATE whitelist SET role = ? WHERE user_id = ? AND role = ?", (UserRole.USER.value, user_id, UserRole.ADMIN.value))
-            if result.rowcount == 0:
-                await ctx.send(embed=discord.Embed(title="Admin Removal", description=f"User {user_id} was not an admin or not in the whitelist.", color=discord.Color.yellow()))
-            else:
-                await ctx.send(embed=discord.Embed(title="Admin Removed", description=f"User {user_id} demoted to regular user.", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in remove_admin: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while demoting the admin. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in remove_admin: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occured while demoting the admin. Please try again later.", color=discord.Color.red()))
+    async with db_transaction() as cur:
+        result = await cur.execute("UPDATE whitelist SET role = ? WHERE user_id = ? AND role = ?", (UserRole.USER.db_value, uid, UserRole.ADMIN.db_value))
+        if result.rowcount > 0:
+            whitelist_cache[uid] = UserRole.USER
+        if result.rowcount == 0:
+            await ctx.send(embed=discord.Embed(title="Admin Removal", description=f"User {user_id} was not an admin or not in the whitelist.", color=discord.Color.yellow()))
+        else:
+            await ctx.send(embed=discord.Embed(title="Admin Removed", description=f"User {user_id} demoted to regular user.", color=discord.Color.green()))
 
 @bot.command(name='setlogchannel')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler("setting the log channel")
 async def set_log_channel(ctx: commands.Context, channel_id: str):
     """
     Set the channel for logging bot activities.
     Usage: ~setlogchannel <channel_id>
     Example: ~setlogchannel 123456789
     """
-    if not channel_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid channel ID. Please provide a valid Discord channel ID.", color=discord.Color.red()))
+    cid = parse_snowflake(channel_id)
+    if cid is None:
+        await ctx.send(embed=ERR_INVALID_CHANNEL_ID)
         return
 
-    try:
-        channel = bot.get_channel(int(channel_id))
-        if channel is None:
-            await ctx.send(embed=discord.Embed(title="Error", description="Channel not found. Make sure the bot has access to the specified channel.", color=discord.Color.red()))
-            return
-
-        await update_config('log_channel', channel_id)
-        await ctx.send(embed=discord.Embed(title="Log Channel Set", description=f"Log channel set to {channel.name} ({channel_id})", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in set_log_channel: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while setting the log channel. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in set_log_channel: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while setting the log channel. Please try again later.", color=discord.Color.red()))
+    channel = bot.get_channel(cid)
+    if channel is None:
+        await ctx.send(embed=error_embed("Channel not found. Make sure the bot has access to the specified channel."))
+        return
 
+    await update_config('log_channel', str(cid))
+    await ctx.send(embed=discord.Embed(title="Log Channel Set", description=f"Log channel set to {channel.name} ({cid})", color=discord.Color.green()))
 
 @bot.command(name='reload')
 @is_whitelisted(UserRole.ADMIN)
 async def reload_bot(ctx: commands.Context):
     """
-    Reload the bot (owner only).
+    Reload configuration and caches without restarting the process.
     Usage: ~reload
     """
-    await ctx.send(embed=discord.Embed(title="Reloading", description="Reloading the bot...", color=discord.Color.blue()))
+    global CONFIG, config_view_cache
     try:
+        CONFIG = await load_db_config()
+        typed_config.refresh(CONFIG)
+        config_view_cache = None
+        await load_whitelist_cache()
+        invalidate_repo_cache()
+        repo_status_cache.clear()
+        channel_cache.clear()
+        # Recreated lazily on next use, picking up any new settings
+        await close_http_session()
+        await ctx.send(embed=discord.Embed(title="Reloaded", description="Configuration and caches reloaded.", color=discord.Color.green()))
+    except Exception as e:
+        error_message = f"Error in reload_bot: {str(e)}"
+        logger.error(error_message)
+        await report_error(error_message)
+        await ctx.send(embed=error_embed("An error occurred while reloading the bot. Please check the logs and try again."))
+
+@bot.command(name='hardreload')
+@is_whitelisted(UserRole.OWNER)
+async def hard_reload_bot(ctx: commands.Context):
+    """
+    Fully restart the bot process (owner only).
+    Usage: ~hardreload
+    """
+    await ctx.send(embed=discord.Embed(title="Reloading", description="Restarting the bot process...", color=discord.Color.blue()))
+    try:
+        await close_http_session()
         await bot.close()
         os.execv(sys.executable, ['python'] + sys.argv)
     except Exception as e:
-        error_message = f"Error in reload_bot: {str(e)}"
+        error_message = f"Error in hard_reload_bot: {str(e)}"
         logger.error(error_message)
         await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An error occurred while reloading the bot. Please check the logs and try again.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("An error occurred while restarting the bot. Please check the logs and try again."))
 
 @bot.command(name='reindex')
 @is_whitelisted(UserRole.ADMIN)
 async def reindex_repo(ctx: commands.Context, repo_id: int = None):
     """
     Force reindexing of a specific repository or all repositories if no ID is provided.
+    The ID is the position shown by ~listrepos.
     Usage: ~reindex [repo_id]
     """
     try:
         repos = await get_repos()
         if not repos:
-            await ctx.send(embed=discord.Embed(title="Error", description="No repositories are currently indexed.", color=discord.Color.red()))
+            await ctx.send(embed=error_embed("No repositories are currently indexed."))
             return
 
         if repo_id is not None:
-            repo = next((r for r in repos if r[0] == repo_id), None)
-            if repo is None:
-                await ctx.send(embed=discord.Embed(title="Error", description=f"No repository found with ID {repo_id}.", color=discord.Color.red()))
+            # Cached rows are (remote, owner, name, branch) without the table
+            # id, so the argument is the 1-based position in the listrepos
+            # ordering; the old filter compared the id against the remote
+            # column and could never match.
+            if not 1 <= repo_id <= len(repos):
+                await ctx.send(embed=error_embed(f"No repository found with ID {repo_id}."))
                 return
-            repos_to_reindex = [repo]
+            repos_to_reindex = [repos[repo_id - 1]]
         else:
             repos_to_reindex = repos
 
@@ -1131,10 +1688,22 @@ async def reindex_repo(ctx: commands.Context, repo_id: int = None):
         error_message = f"Unexpected error in reindex_repo: {str(e)}"
         logger.error(error_message)
         await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while reindexing. Please try again later.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("An unexpected error occurred while reindexing. Please try again later."))
+
+
+# Short-lived cache of repository status responses, keyed by repo_id.
+# Collapses the polling storms caused by several users (or the background
+# status loop) asking Greptile about the same repository at the same time.
+repo_status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+REPO_STATUS_TTL = 30  # seconds
+REPO_STATUS_EVICT_AFTER = 300  # expired entries older than this are purged on read
 
+# In-flight status fetches keyed by repo_id. Callers that miss the TTL cache
+# while another fetch for the same repository is already on the wire join
+# that fetch instead of issuing a duplicate request (single-flight).
+repo_status_inflight: Dict[str, asyncio.Task] = {}
 
-async def get_repository_status(ctx: commands.Context, repo: Tuple[str, str, str, str], max_retries: int = 3) -> Optional[Dict[str, Any]]:
+async def get_repository_status(ctx: commands.Context, repo: Tuple[str, str, str, str], max_retries: int = 3, ttl: float = REPO_STATUS_TTL, announce: bool = True) -> Optional[Dict[str, Any]]:
     """
     Get the status and additional information of a repository from the Greptile API.
 
@@ -1142,47 +1711,70 @@ async def get_repository_status(ctx: commands.Context, repo: Tuple[str, str, str
     ctx (commands.Context): The context of the command, used for sending notifications.
     repo (Tuple[str, str, str, str]): A tuple containing (remote, owner, name, branch) of the repository.
     max_retries (int): Maximum number of retries for the API call.
+    ttl (float): Maximum age in seconds of a cached status to reuse; pass 0 to force a fresh fetch.
+    announce (bool): Send the progress/status embeds to the channel. Callers
+        that aggregate several repos (or poll in a loop) pass False and
+        render the returned data themselves; error embeds are always sent.
 
     Returns:
     Optional[Dict[str, Any]]: A dictionary containing repository information, or None if an error occurred.
     """
     remote, owner, name, branch = repo
     repo_id = f"{remote}:{branch}:{owner}/{name}"
-    encoded_repo_id = urllib.parse.quote(repo_id, safe='')
-    url = f'https://api.greptile.com/v2/repositories/{encoded_repo_id}'
-    
-    headers = {
-        'Authorization': f'Bearer {GREPTILE_API_KEY}',
-        'X-GitHub-Token': GITHUB_TOKEN
-    }
 
-    # Notify the user that we're checking the repository status
-    await ctx.send(embed=discord.Embed(title="Checking Repository Status", description=f"Fetching status for {owner}/{name}...", color=discord.Color.blue()))
+    now = time.monotonic()
+    if ttl > 0:
+        cached = repo_status_cache.get(repo_id)
+        if cached is not None and now - cached[0] < ttl:
+            return cached[1]
+
+    # Lazy eviction on the miss path: entries nobody has refreshed in a
+    # while belong to removed repos (or long-idle ones) and would otherwise
+    # pin their last status dict forever.
+    if len(repo_status_cache) > 32:
+        for stale in [key for key, (stamp, _) in repo_status_cache.items() if now - stamp > REPO_STATUS_EVICT_AFTER]:
+            del repo_status_cache[stale]
+
+    task = repo_status_inflight.get(repo_id)
+    if task is None or task.done():
+        task = asyncio.ensure_future(_fetch_repository_status(ctx, repo, max_retries, repo_id, announce))
+        repo_status_inflight[repo_id] = task
+        task.add_done_callback(lambda _: repo_status_inflight.pop(repo_id, None))
+    return await task
+
+async def _fetch_repository_status(ctx: commands.Context, repo: Tuple[str, str, str, str], max_retries: int, repo_id: str, announce: bool = True) -> Optional[Dict[str, Any]]:
+    remote, owner, name, branch = repo
+    url = status_url(*repo)
+
+    if announce:
+        # Notify the user that we're checking the repository status
+        await ctx.send(embed=discord.Embed(title="Checking Repository Status", description=f"Fetching status for {owner}/{name}...", color=discord.Color.blue()))
 
     for attempt in range(max_retries):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    response.raise_for_status()
-                    repo_info = await response.json()
-                    logger.info(f"Repository info retrieved successfully: {repo_info}")
-
-                    # Extract relevant information
-                    status = repo_info.get('status', 'Unknown')
-                    files_processed = repo_info.get('filesProcessed', 0)
-                    num_files = repo_info.get('numFiles', 0)
-                    sample_questions = repo_info.get('sampleQuestions', [])
-                    sha = repo_info.get('sha', 'N/A')
-
-                    # Create a dictionary with the extracted information
-                    result = {
-                        'status': status,
-                        'filesProcessed': files_processed,
-                        'numFiles': num_files,
-                        'sampleQuestions': sample_questions,
-                        'sha': sha
-                    }
+            session = await get_http_session()
+            async with greptile_semaphore, session.get(url) as response:
+                response.raise_for_status()
+                repo_info = json_loads(await response.read())
+                logger.info("Repository info retrieved successfully: %s", repo_info)
+
+                # Extract relevant information
+                status = repo_info.get('status', 'Unknown')
+                files_processed = repo_info.get('filesProcessed', 0)
+                num_files = repo_info.get('numFiles', 0)
+                sample_questions = repo_info.get('sampleQuestions', [])
+                sha = repo_info.get('sha', 'N/A')
+
+                # Create a dictionary with the extracted information
+                result = {
+                    'status': status,
+                    'filesProcessed': files_processed,
+                    'numFiles': num_files,
+                    'sampleQuestions': sample_questions,
+                    'sha': sha
+                }
 
+                if announce:
                     # Notify the user about the retrieved status
                     status_color = discord.Color.green() if status == 'completed' else discord.Color.orange()
                     status_embed = discord.Embed(title="Repository Status", color=status_color)
@@ -1192,41 +1784,57 @@ async def get_repository_status(ctx: commands.Context, repo: Tuple[str, str, str
                     status_embed.add_field(name="SHA", value=sha, inline=True)
                     if sample_questions:
                         status_embed.add_field(name="Sample Questions", value="\n".join(sample_questions[:3]), inline=False)
-                    
+
                     await ctx.send(embed=status_embed)
 
-                    return result
+                # Stamp after the response returns so the cache age reflects data age
+                repo_status_cache[repo_id] = (time.monotonic(), result)
+
+                return result
 
         except aiohttp.ServerDisconnectedError:
             if attempt < max_retries - 1:
                 wait_time = 2 ** attempt  # exponential backoff
-                logger.warning(f"Server disconnected. Retrying in {wait_time} seconds...")
+                logger.warning("Server disconnected. Retrying in %s seconds...", wait_time)
                 await asyncio.sleep(wait_time)
             else:
                 logger.error("Server disconnected after max retries")
                 await report_error("Server disconnected in get_repository_status after max retries")
-                await ctx.send(embed=discord.Embed(title="Error", description="Failed to retrieve repository status due to server disconnection.", color=discord.Color.red()))
+                await ctx.send(embed=error_embed("Failed to retrieve repository status due to server disconnection."))
                 return None
 
         except aiohttp.ClientResponseError as e:
-            logger.error(f"HTTP error occurred while checking repository status: {e.status} - {e.message}")
-            await report_error(f"HTTP error in get_repository_status: {e.status} - {e.message}")
-            await ctx.send(embed=discord.Embed(title="Error", description=f"Failed to retrieve repository status. HTTP Error: {e.status}", color=discord.Color.red()))
-            return None
+            if e.status in (429, 500, 502, 503, 504) and attempt < max_retries - 1:
+                wait_time = 2 ** attempt * (0.5 + random.random() / 2)  # jittered backoff
+                logger.warning("Transient HTTP %s while checking repository status. Retrying in %.1f seconds...", e.status, wait_time)
+                await asyncio.sleep(wait_time)
+            else:
+                logger.error("HTTP error occurred while checking repository status: %s - %s", e.status, e.message)
+                await report_error(f"HTTP error in get_repository_status: {e.status} - {e.message}")
+                await ctx.send(embed=error_embed(f"Failed to retrieve repository status. HTTP Error: {e.status}"))
+                return None
 
         except aiohttp.ClientError as e:
-            logger.error(f"An error occurred while checking repository status: {str(e)}")
-            logger.error(f"URL attempted: {url}")
+            logger.error("An error occurred while checking repository status: %s", e)
+            logger.error("URL attempted: %s", url)
             await report_error(f"Client error in get_repository_status: {str(e)}")
-            await ctx.send(embed=discord.Embed(title="Error", description="Failed to retrieve repository status due to a client error.", color=discord.Color.red()))
+            await ctx.send(embed=error_embed("Failed to retrieve repository status due to a client error."))
             return None
 
         except Exception as e:
-            logger.error(f"Unexpected error in get_repository_status: {str(e)}")
+            logger.error("Unexpected error in get_repository_status: %s", e)
             await report_error(f"Unexpected error in get_repository_status: {str(e)}")
-            await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while retrieving repository status.", color=discord.Color.red()))
+            await ctx.send(embed=error_embed("An unexpected error occurred while retrieving repository status."))
             return None
 
+async def get_repository_statuses(ctx: commands.Context, repos: List[Tuple[str, str, str, str]], ttl: float = REPO_STATUS_TTL) -> List[Optional[Dict[str, Any]]]:
+    """Fetch the status of several repositories concurrently.
+
+    The per-repo calls are latency-bound on the Greptile API, so fanning out
+    with gather makes multi-repo operations take one round-trip instead of N.
+    """
+    return await asyncio.gather(*(get_repository_status(ctx, repo, ttl=ttl, announce=False) for repo in repos))
+
 @bot.command(name='repostatus')
 @is_whitelisted(UserRole.USER)
 async def repo_status(ctx: commands.Context):
@@ -1242,12 +1850,10 @@ async def repo_status(ctx: commands.Context):
 
         status_embed = discord.Embed(title="Repository Status", color=discord.Color.blue())
 
-        for repo in repos:
+        status_infos = await get_repository_statuses(ctx, repos)
+        for repo, status_info in zip(repos, status_infos):
             remote, owner, name, branch = repo
-            repo_id = f"{remote}:{branch}:{owner}/{name}"
-            
-            status_info = await get_repository_status(ctx, repo)
-            
+
             if status_info is None:
                 status_embed.add_field(
                     name=f"{owner}/{name}",
@@ -1276,38 +1882,29 @@ async def repo_status(ctx: commands.Context):
         error_message = f"Unexpected error in repo_status: {str(e)}"
         logger.error(error_message)
         await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while fetching repository status. Please try again later.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("An unexpected error occurred while fetching repository status. Please try again later."))
 
 @bot.command(name='seterrorchannel')
 @is_whitelisted(UserRole.ADMIN)
+@command_errorhandler("setting the error channel")
 async def set_error_channel(ctx: commands.Context, channel_id: str):
     """
     Set the channel for error reporting.
     Usage: ~seterrorchannel <channel_id>
     Example: ~seterrorchannel 123456789
     """
-    if not channel_id.isdigit():
-        await ctx.send(embed=discord.Embed(title="Error", description="Invalid channel ID. Please provide a valid Discord channel ID.", color=discord.Color.red()))
+    cid = parse_snowflake(channel_id)
+    if cid is None:
+        await ctx.send(embed=ERR_INVALID_CHANNEL_ID)
         return
 
-    try:
-        channel = bot.get_channel(int(channel_id))
-        if channel is None:
-            await ctx.send(embed=discord.Embed(title="Error", description="Channel not found. Make sure the bot has access to the specified channel.", color=discord.Color.red()))
-            return
+    channel = bot.get_channel(cid)
+    if channel is None:
+        await ctx.send(embed=error_embed("Channel not found. Make sure the bot has access to the specified channel."))
+        return
 
-        await update_config('error_channel', channel_id)
-        await ctx.send(embed=discord.Embed(title="Error Channel Set", description=f"Error channel set to {channel.name} ({channel_id})", color=discord.Color.green()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in set_error_channel: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while setting the error channel. Please try again later.", color=discord.Color.red()))
-    except Exception as e:
-        error_message = f"Unexpected error in set_error_channel: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while setting the error channel. Please try again later.", color=discord.Color.red()))
+    await update_config('error_channel', str(cid))
+    await ctx.send(embed=discord.Embed(title="Error Channel Set", description=f"Error channel set to {channel.name} ({cid})", color=discord.Color.green()))
 
 @bot.command(name='testerror')
 @is_whitelisted(UserRole.ADMIN)
@@ -1332,47 +1929,62 @@ async def view_config(ctx: commands.Context):
     View the current bot configuration.
     Usage: ~viewconfig
     """
+    global config_view_cache
     try:
-        async with db_pool.acquire() as conn:
-            async with conn.execute("SELECT key, value FROM config") as cursor:
-                config_items = await cursor.fetchall()
-        
-        config_str = "\n".join([f"{k}: {v}" for k, v in config_items])
-        await ctx.send(embed=discord.Embed(title="Current Configuration", description=config_str, color=discord.Color.blue()))
-    except sqlite3.Error as e:
-        error_message = f"Database error in view_config: {str(e)}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="A database error occurred while retrieving the configuration. Please try again later.", color=discord.Color.red()))
+        # CONFIG is write-through, so render from it rather than re-reading
+        # the table; the rendered string is reused until the next write.
+        if config_view_cache is None:
+            config_view_cache = "\n".join(f"{k}: {v}" for k, v in CONFIG.items())
+        await ctx.send(embed=discord.Embed(title="Current Configuration", description=config_view_cache, color=discord.Color.blue()))
     except Exception as e:
         error_message = f"Unexpected error in view_config: {str(e)}"
         logger.error(error_message)
         await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred while retrieving the configuration. Please try again later.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("An unexpected error occurred while retrieving the configuration. Please try again later."))
 
 # Error handling
 @bot.event
 async def on_command_error(ctx, error):
     if isinstance(error, commands.CommandNotFound):
-        await ctx.send(embed=discord.Embed(title="Error", description="Command not found. Use `~greptilehelp` to see available commands.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("Command not found. Use `~greptilehelp` to see available commands."))
+    elif isinstance(error, QueryLimitReached):
+        label = {'smart_queries': 'smart queries', 'search': 'searches'}.get(error.query_type, 'queries')
+        await ctx.send(embed=error_embed(f"You have reached the maximum number of {label} for today."))
     elif isinstance(error, commands.CheckFailure):
-        await ctx.send(embed=discord.Embed(title="Error", description="You don't have permission to use this command.", color=discord.Color.red()))
+        await ctx.send(embed=error_embed("You don't have permission to use this command."))
     elif isinstance(error, commands.MissingRequiredArgument):
-        await ctx.send(embed=discord.Embed(title="Error", description=f"Missing required argument: {error.param.name}", color=discord.Color.red()))
+        await ctx.send(embed=error_embed(f"Missing required argument: {error.param.name}"))
     else:
-        error_message = f"An unexpected error occurred: {str(error)}\n\nTraceback:\n{''.join(traceback.format_tb(error.__traceback__))}"
-        logger.error(error_message)
-        await report_error(error_message)
-        await ctx.send(embed=discord.Embed(title="Error", description="An unexpected error occurred. The bot owner has been notified.", color=discord.Color.red()))
+        summary = f"An unexpected error occurred: {str(error)}"
+        if is_error_suppressed(summary):
+            # Same failure inside the dedup window: the report would be
+            # dropped anyway, so don't pay for the stack walk and formatting.
+            logger.error(summary)
+        else:
+            formatted_tb = ''.join(traceback.format_tb(error.__traceback__))
+            logger.error("%s\n\nTraceback:\n%s", summary, formatted_tb)
+            await report_error(summary, {'traceback': formatted_tb[:MAX_EMBED_FIELD_VALUE_LENGTH]})
+        await ctx.send(embed=error_embed("An unexpected error occurred. The bot owner has been notified."))
 
 @bot.event
 async def on_ready():
     global CONFIG
     print(f'{bot.user} has connected to Discord!')
-    CONFIG = await load_db_config()
-    check_repo_status.start()
-
-@tasks.loop(minutes=30)
+    # on_ready fires again after reconnects; CONFIG is kept write-through by
+    # update_config, so only load it when it hasn't been populated yet.
+    if not CONFIG:
+        CONFIG = await load_db_config()
+        typed_config.refresh(CONFIG)
+    # Warm the shared HTTP session now so the first command after startup
+    # doesn't pay connector construction on its own latency.
+    await get_http_session()
+    if not check_repo_status.is_running():
+        check_repo_status.start()
+
+# Status is fetched on demand (with a short TTL cache) by repostatus and the
+# indexing watchers, so this loop only exists to flag repos that fail while
+# nobody is looking. A slow cadence is plenty and keeps the bot idle-quiet.
+@tasks.loop(hours=6)
 async def check_repo_status():
     logger.info("Starting repository status check cycle")
     try:
@@ -1381,41 +1993,42 @@ async def check_repo_status():
             logger.info("No repositories found to check.")
             return
 
-        logger.info(f"Checking status for {len(repos)} repositories")
+        logger.info("Checking status for %s repositories", len(repos))
 
         class MockContext:
             async def send(self, embed):
                 # Log the embed content instead of sending to a Discord channel
-                logger.info(f"Repository status update: {embed.to_dict()}")
+                logger.info("Repository status update: %s", embed.to_dict())
 
         mock_ctx = MockContext()
 
-        for repo in repos:
+        # Overlap the per-repo HTTPS round trips instead of paying them
+        # sequentially; total time becomes the slowest repo, not the sum.
+        status_infos = await get_repository_statuses(mock_ctx, repos)
+
+        for repo, status_info in zip(repos, status_infos):
             try:
                 remote, owner, name, branch = repo
                 repo_id = f"{remote}:{branch}:{owner}/{name}"
-                logger.info(f"Checking status for repository: {repo_id}")
-                
-                status_info = await get_repository_status(mock_ctx, repo)
-                
+
                 if status_info is None:
-                    logger.error(f"Failed to retrieve status for repository {repo_id}")
+                    logger.error("Failed to retrieve status for repository %s", repo_id)
                     continue
 
                 status = status_info['status']
                 files_processed = status_info['filesProcessed']
                 num_files = status_info['numFiles']
 
-                logger.info(f"Repository {repo_id} status: {status}, Files processed: {files_processed}/{num_files}")
+                logger.info("Repository %s status: %s, Files processed: %s/%s", repo_id, status, files_processed, num_files)
 
                 if status == 'failed':
                     error_message = f"Repository {repo_id} indexing has failed."
                     logger.error(error_message)
                     await report_error(error_message)
                 elif status == 'processing':
-                    logger.warning(f"Repository {repo_id} is still processing. This may need attention.")
+                    logger.warning("Repository %s is still processing. This may need attention.", repo_id)
                 elif status not in ['completed', 'submitted', 'cloning']:
-                    logger.info(f"Repository {repo_id} has unexpected status: {status}")
+                    logger.info("Repository %s has unexpected status: %s", repo_id, status)
 
             except Exception as e:
                 error_message = f"Unexpected error checking status for repo {repo_id}: {str(e)}"
@@ -1450,35 +2063,47 @@ async def setup_bot():
     """Perform initial bot setup."""
     global CONFIG
     
-    await db_pool.init()
+    await db.init()
     
     try:
-        async with db_pool.acquire() as conn:
-            # Create tables if they don't exist
-            await conn.execute('''
+        async with db.acquire() as conn:
+            # Create tables and seed the owner row in one script: a single
+            # hop through the aiosqlite worker instead of four. The owner ID
+            # is validated as an integer before being inlined.
+            await conn.executescript(f'''
                 CREATE TABLE IF NOT EXISTS whitelist (
-                    user_id TEXT PRIMARY KEY,
+                    user_id INTEGER PRIMARY KEY,
                     role TEXT
-                )
-            ''')
-            await conn.execute('''
+                );
                 CREATE TABLE IF NOT EXISTS repos (
                     id INTEGER PRIMARY KEY,
                     remote TEXT,
                     owner TEXT,
                     name TEXT,
                     branch TEXT
-                )
-            ''')
-            await conn.execute('''
+                );
                 CREATE TABLE IF NOT EXISTS config (
                     key TEXT PRIMARY KEY,
                     value TEXT
-                )
+                );
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_repos_key
+                    ON repos(remote, owner, name, branch);
+                INSERT OR REPLACE INTO whitelist (user_id, role)
+                    VALUES ({BOT_OWNER_ID}, '{UserRole.OWNER.db_value}');
             ''')
-            
-            # Ensure the bot owner is in the whitelist as an owner
-            await conn.execute("INSERT OR REPLACE INTO whitelist (user_id, role) VALUES (?, ?)", (BOT_OWNER_ID, UserRole.OWNER.value))
+
+            # Migrate pre-existing databases that still store snowflakes as
+            # TEXT; integer keys halve the index bytes and compare without
+            # string walks.
+            async with conn.execute("PRAGMA table_info(whitelist)") as cursor:
+                columns = await cursor.fetchall()
+            if columns and columns[0][2].upper() == 'TEXT':
+                await conn.executescript('''
+                    CREATE TABLE whitelist_new (user_id INTEGER PRIMARY KEY, role TEXT);
+                    INSERT INTO whitelist_new SELECT CAST(user_id AS INTEGER), role FROM whitelist;
+                    DROP TABLE whitelist;
+                    ALTER TABLE whitelist_new RENAME TO whitelist;
+                ''')
             
             default_config = {
                 'MAX_QUERIES_PER_DAY': '5',
@@ -1487,15 +2112,19 @@ async def setup_bot():
                 'API_TIMEOUT': '60',
                 'API_RETRIES': '3',
                 'DEFAULT_BRANCH': 'main',
+                'GREPTILE_CONCURRENCY': '8',
                 'BOT_PREFIX': '~'
             }
             
-            for key, value in default_config.items():
-                await conn.execute("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", (key, value))
+            # One prepared statement bound across all rows instead of a
+            # round-trip through the aiosqlite worker per key.
+            await conn.executemany("INSERT OR IGNORE INTO config (key, value) VALUES (?, ?)", list(default_config.items()))
             
             await conn.commit()
         
         CONFIG = await load_db_config()
+        typed_config.refresh(CONFIG)
+        await load_whitelist_cache()
     except sqlite3.Error as e:
         error_message = f"Database error in setup_bot: {str(e)}"
         logger.error(error_message)
@@ -1505,10 +2134,18 @@ async def setup_bot():
         logger.error(error_message)
         raise RuntimeError(f"Failed to set up the bot due to an unexpected error: {str(e)}")
 
-# Initialize the static variables
-report_error.last_error_time = None
-report_error.last_error_message = None
+async def main():
+    # One event loop for everything: the old asyncio.run(setup_bot()) +
+    # bot.run(TOKEN) pattern created the DB connection on a loop that was
+    # already closed by the time the bot used it.
+    await setup_bot()
+    try:
+        await bot.start(TOKEN)
+    finally:
+        await close_http_session()
+        await db.close()
 
 if __name__ == "__main__":
-    asyncio.run(setup_bot())
-    bot.run(TOKEN)
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(main())